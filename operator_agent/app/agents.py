@@ -1,12 +1,40 @@
 import asyncio
+import json
 import logging
-from typing import Dict, List, Optional, Any
+import re
+import weakref
+from typing import Dict, List, Optional, Any, AsyncIterator
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Task keywords that suggest which tools were used, one named group per tool; each group is an
+# optional lookahead so overlapping keywords all match, like plain substring checks
+_TOOL_KW_RE = re.compile(
+    r"(?=(?P<ws>websearch|search))?"
+    r"(?=(?P<fs>jacket|patagonia|tokyo|shop|preference|budget|docs|documentation))?"
+    r"(?=(?P<at>airtable))?"
+    r"(?=(?P<mcp>file|write|create|sandbox))?"
+    r"(?=(?P<ct>open|click|type|navigate|cart|website))?"
+)
+
+
+def _tool_keyword_hits(task_lower: str) -> set:
+    """Names of the keyword groups found anywhere in a lowercased task"""
+    return {group for m in _TOOL_KW_RE.finditer(task_lower)
+            for group, keyword in m.groupdict().items() if keyword}
+
+
+# (tool name, keyword group, summary, availability check) used to report tool usage
+_TOOL_TABLE = [
+    ("WebSearch", "ws", "Searched the web", lambda: True),
+    ("FileSearch", "fs", "Searched internal documentation", lambda: settings.has_vector_store),
+    ("Airtable", "at", "Logged to Airtable", lambda: settings.has_airtable),
+    ("MCP", "mcp", "Used filesystem operations", lambda: has_mcp),
+    ("ComputerTool", "ct", "Controlled browser in {mode} mode", lambda: ComputerTool is not None),
+]
+
 # Only import OpenAI SDK if API key is available
-agent = None
 runner = None
 WebSearchTool = None
 FileSearchTool = None
@@ -14,6 +42,11 @@ ComputerTool = None
 FunctionTool = None
 mcp_server = None
 has_mcp = False
+# Agents and their init locks are keyed weakly by event loop, so none is reused across loops
+# and entries go away with their loop
+_agents: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_agent_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_capabilities_cache = None
 
 if settings.has_openai:
     try:
@@ -23,7 +56,106 @@ if settings.has_openai:
         settings.openai_api_key = None
 
 
-def create_agent() -> Optional[Any]:
+def _init_websearch() -> Optional[Any]:
+    """WebSearch (always available with API key)"""
+    try:
+        web_tool = WebSearchTool()  # Remove max_num_results parameter
+        logger.info("WebSearch tool enabled")
+        return web_tool
+    except Exception as e:
+        logger.warning(f"Could not initialize WebSearch: {e}")
+        return None
+
+
+def _init_filesearch() -> Optional[Any]:
+    """FileSearch (if vector store configured and not mock)"""
+    if not settings.has_vector_store or settings.openai_vector_store_id.startswith("vs_mock_"):
+        return None
+    try:
+        file_tool = FileSearchTool(
+            vector_store_ids=[settings.openai_vector_store_id]
+        )
+        logger.info(f"FileSearch tool enabled with store: {settings.openai_vector_store_id}")
+        return file_tool
+    except Exception as e:
+        logger.warning(f"Could not initialize FileSearch: {e}")
+        return None
+
+
+def _init_computer() -> Optional[Any]:
+    """Computer Use Tool for desktop/browser control"""
+    if not ComputerTool:
+        return None
+    try:
+        # ComputerTool requires a Computer implementation
+        from app.mock_computer import MockComputer
+        
+        # Create a mock computer for testing
+        mock_computer = MockComputer()
+        
+        # Create ComputerTool with the mock computer
+        computer_tool = ComputerTool(computer=mock_computer)
+        logger.info(f"ComputerTool enabled with MockComputer - will simulate screenshots and actions")
+        return computer_tool
+    except Exception as e:
+        logger.warning(f"Could not initialize ComputerTool: {e}")
+        return None
+
+
+def _airtable_tool_def() -> Optional[Dict[str, Any]]:
+    """Build the Airtable function definition once (if configured)"""
+    if not settings.has_airtable or not FunctionTool:
+        return None
+    try:
+        from app.tools.airtable_tool import create_airtable_tool
+        return create_airtable_tool(settings)
+    except Exception as e:
+        logger.warning(f"Could not initialize Airtable tool: {e}")
+        return None
+
+
+def _init_airtable(airtable_tool_def: Optional[Dict[str, Any]]) -> Optional[Any]:
+    """Airtable tool (if configured)"""
+    if not airtable_tool_def:
+        return None
+    try:
+        # FunctionTool expects only the function as argument
+        airtable_tool = FunctionTool(airtable_tool_def["function"])
+        logger.info("Airtable tool enabled")
+        return airtable_tool
+    except Exception as e:
+        logger.warning(f"Could not initialize Airtable tool: {e}")
+    return None
+
+
+def _init_batch(local_tool_defs: List[Dict[str, Any]]) -> Optional[Any]:
+    """Batch tool so the model can fan out independent local function calls"""
+    if not FunctionTool:
+        return None
+    try:
+        from app.tools.batch_tool import create_batch_tool
+        
+        local_functions = {tool_def["name"]: tool_def["function"] for tool_def in local_tool_defs}
+        batch_tool_def = create_batch_tool(local_functions)
+        if batch_tool_def:
+            async def invoke_batch(ctx, args_json: str):
+                return await batch_tool_def["function"](**json.loads(args_json))
+            
+            batch_tool = FunctionTool(
+                name=batch_tool_def["name"],
+                description=batch_tool_def["description"],
+                params_json_schema=batch_tool_def["parameters"],
+                on_invoke_tool=invoke_batch,
+                strict_json_schema=False
+            )
+            logger.info("Batch tool enabled")
+            return batch_tool
+    except Exception as e:
+        logger.warning(f"Could not initialize batch tool: {e}")
+    return None
+
+
+async def create_agent() -> Optional[Any]:
     """Create the main agent with available tools"""
     global mcp_server, has_mcp
     
@@ -31,57 +163,33 @@ def create_agent() -> Optional[Any]:
         logger.info("OpenAI API key not configured - running in demo mode")
         return None
     
-    tools = []
     mcp_servers = []
     
-    # WebSearch (always available with API key)
-    try:
-        web_tool = WebSearchTool()  # Remove max_num_results parameter
-        tools.append(web_tool)
-        logger.info("WebSearch tool enabled")
-    except Exception as e:
-        logger.warning(f"Could not initialize WebSearch: {e}")
-    
-    # FileSearch (if vector store configured and not mock)
-    if settings.has_vector_store and not settings.openai_vector_store_id.startswith("vs_mock_"):
-        try:
-            file_tool = FileSearchTool(
-                vector_store_ids=[settings.openai_vector_store_id]
-            )
-            tools.append(file_tool)
-            logger.info(f"FileSearch tool enabled with store: {settings.openai_vector_store_id}")
-        except Exception as e:
-            logger.warning(f"Could not initialize FileSearch: {e}")
-    
-    # Computer Use Tool
-    # Enable ComputerTool for desktop/browser control
-    if ComputerTool:
-        try:
-            # ComputerTool requires a Computer implementation
-            from app.mock_computer import MockComputer
-            
-            # Create a mock computer for testing
-            mock_computer = MockComputer()
-            
-            # Create ComputerTool with the mock computer
-            computer_tool = ComputerTool(computer=mock_computer)
-            tools.append(computer_tool)
-            logger.info(f"ComputerTool enabled with MockComputer - will simulate screenshots and actions")
-        except Exception as e:
-            logger.warning(f"Could not initialize ComputerTool: {e}")
+    # Local function definitions are built once and shared by their own tool and the batch tool
+    airtable_tool_def = await asyncio.to_thread(_airtable_tool_def)
+    local_tool_defs = [airtable_tool_def] if airtable_tool_def else []
     
-    # Airtable tool (if configured)
-    if settings.has_airtable and FunctionTool:
-        try:
-            from app.tools.airtable_tool import create_airtable_tool
-            airtable_tool_def = create_airtable_tool(settings)
-            if airtable_tool_def:
-                # FunctionTool expects only the function as argument
-                airtable_tool = FunctionTool(airtable_tool_def["function"])
-                tools.append(airtable_tool)
-                logger.info("Airtable tool enabled")
-        except Exception as e:
-            logger.warning(f"Could not initialize Airtable tool: {e}")
+    # Tool setups are independent, so run them concurrently
+    initers = [
+        (_init_websearch, ()),
+        (_init_filesearch, ()),
+        (_init_computer, ()),
+        (_init_airtable, (airtable_tool_def,)),
+        (_init_batch, (local_tool_defs,)),
+    ]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(init, *args) for init, args in initers),
+        return_exceptions=True
+    )
+    tools = []
+    batch_tool = None
+    for (init, _), result in zip(initers, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Tool setup {init.__name__} failed: {result}")
+        elif result is not None:
+            tools.append(result)
+            if init is _init_batch:
+                batch_tool = result
     
     # MCP filesystem server (if npm available)
     # Temporarily disabled due to connection issues
@@ -109,7 +217,9 @@ def create_agent() -> Optional[Any]:
                 "- Use ComputerTool to control the browser when tasks mention 'open', 'click', 'type', or 'add to cart'\n"
                 "- Use MCP filesystem tools to read/write files in the sandbox directory\n"
                 "- Use Airtable to log records when requested\n"
-                "When using ComputerTool, explain your actions step by step."
+                + ("- When multiple tools are independent, call `batch` with all invocations at once\n"
+                   if batch_tool is not None else "")
+                + "When using ComputerTool, explain your actions step by step."
             ),
             "tools": tools
         }
@@ -126,6 +236,28 @@ def create_agent() -> Optional[Any]:
         return None
 
 
+async def get_agent() -> Optional[Any]:
+    """Get the agent for the running event loop, creating it once if needed"""
+    loop = asyncio.get_running_loop()
+    agent = _agents.get(loop)
+    if agent is None:
+        # Only one coroutine per loop builds the agent; the rest wait and reuse it
+        lock = _agent_locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            agent = _agents.get(loop)
+            if agent is None:
+                agent = await create_agent()
+                if agent is not None:
+                    _agents[loop] = agent
+    return agent
+
+
+def reset_agents():
+    """Drop cached agents so the next get_agent() rebuilds with current settings"""
+    _agents.clear()
+    _agent_locks.clear()
+
+
 async def run_agent(task_text: str) -> Dict[str, Any]:
     """Run the agent with a task and return results"""
     
@@ -138,20 +270,18 @@ async def run_agent(task_text: str) -> Dict[str, Any]:
                 f"Your task was: '{task_text}'"
             ),
             "tool_calls": [],
+            "tool_names": frozenset(),
             "used_file_search": False,
             "computer_mode": settings.computer_mode,
             "mode": "demo"
         }
     
-    # Create agent if not exists
-    global agent
-    if agent is None:
-        agent = create_agent()
-    
+    agent = await get_agent()
     if agent is None:
         return {
             "final_text": "Failed to initialize agent. Please check your configuration.",
             "tool_calls": [],
+            "tool_names": frozenset(),
             "used_file_search": False,
             "computer_mode": settings.computer_mode,
             "mode": "error"
@@ -165,47 +295,21 @@ async def run_agent(task_text: str) -> Dict[str, Any]:
         # Extract tool usage (simplified for now)
         # In production, parse the actual result for tool calls
         task_lower = task_text.lower()
+        hits = _tool_keyword_hits(task_lower)
         
-        if "websearch" in task_lower or "search" in task_lower:
-            tool_calls.append({
-                "name": "WebSearch",
-                "status": "ok",
-                "summary": "Searched the web"
-            })
-        
-        if settings.has_vector_store and any(word in task_lower for word in 
-            ["jacket", "patagonia", "tokyo", "shop", "preference", "budget", "docs", "documentation"]):
-            tool_calls.append({
-                "name": "FileSearch",
-                "status": "ok",
-                "summary": "Searched internal documentation"
-            })
-        
-        if settings.has_airtable and "airtable" in task_lower:
-            tool_calls.append({
-                "name": "Airtable",
-                "status": "ok",
-                "summary": "Logged to Airtable"
-            })
+        tool_calls = [
+            {"name": name, "status": "ok", "summary": summary.format(mode=settings.computer_mode)}
+            for name, group, summary, available in _TOOL_TABLE
+            if group in hits and available()
+        ]
         
-        if has_mcp and any(word in task_lower for word in ["file", "write", "create", "sandbox"]):
-            tool_calls.append({
-                "name": "MCP",
-                "status": "ok",
-                "summary": "Used filesystem operations"
-            })
-        
-        if ComputerTool and any(word in task_lower for word in ["open", "click", "type", "navigate", "cart", "website"]):
-            tool_calls.append({
-                "name": "ComputerTool",
-                "status": "ok",
-                "summary": f"Controlled browser in {settings.computer_mode} mode"
-            })
+        tool_names = frozenset(tc["name"] for tc in tool_calls)
         
         return {
             "final_text": result.final_output if hasattr(result, 'final_output') else str(result),
             "tool_calls": tool_calls,
-            "used_file_search": any(tc["name"] == "FileSearch" for tc in tool_calls),
+            "tool_names": tool_names,
+            "used_file_search": "FileSearch" in tool_names,
             "computer_mode": settings.computer_mode,
             "mode": "live"
         }
@@ -215,18 +319,36 @@ async def run_agent(task_text: str) -> Dict[str, Any]:
         return {
             "final_text": f"I encountered an error while processing your request: {str(e)}",
             "tool_calls": tool_calls,
+            "tool_names": frozenset(tc["name"] for tc in tool_calls),
             "used_file_search": False,
             "computer_mode": settings.computer_mode,
             "mode": "error"
         }
 
 
+async def run_agent_stream(task_text: str) -> AsyncIterator[Any]:
+    """Run the agent and yield SDK stream events as they are produced"""
+    agent = await get_agent()
+    if agent is None:
+        raise RuntimeError("Failed to initialize agent")
+    
+    result = Runner.run_streamed(agent, input=task_text)
+    async for event in result.stream_events():
+        yield event
+
+
 def get_capabilities() -> Dict[str, Any]:
     """Get current tool capabilities for health check"""
-    return {
-        "websearch": settings.has_openai,
-        "filesearch": settings.has_openai and settings.has_vector_store and not settings.openai_vector_store_id.startswith("vs_mock_"),
-        "computer": settings.computer_mode,
-        "airtable": settings.has_airtable,
-        "mcp": has_mcp
-    }
\ No newline at end of file
+    global _capabilities_cache
+    
+    # Only rebuild when settings or MCP availability changed
+    key = (settings.version, has_mcp)
+    if _capabilities_cache is None or _capabilities_cache[0] != key:
+        _capabilities_cache = (key, {
+            "websearch": settings.has_openai,
+            "filesearch": settings.has_openai and settings.has_vector_store and not settings.openai_vector_store_id.startswith("vs_mock_"),
+            "computer": settings.computer_mode,
+            "airtable": settings.has_airtable,
+            "mcp": has_mcp
+        })
+    return dict(_capabilities_cache[1])
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Conversation session store shared by the WebSocket handlers
+"""
+
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Conversations kept in memory before the least recently used are evicted
+MAX_CONVERSATIONS = 10_000
+
+
+class ConversationManager:
+    """Manage conversation sessions and history"""
+    
+    def __init__(self):
+        # In-memory LRU storage (replace with Redis/DB in production)
+        self.sessions: "OrderedDict[str, dict]" = OrderedDict()
+    
+    def get_or_create_session(self, session_id: str = None) -> str:
+        """Get existing session or create new one"""
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        if session_id in self.sessions:
+            self.sessions.move_to_end(session_id)
+        else:
+            self.sessions[session_id] = {
+                "id": session_id,
+                "messages": deque(maxlen=settings.max_history),
+                "created_at": time.monotonic()
+            }
+            logger.info("Created new session: %s", session_id)
+            
+            # Evict the least recently used sessions beyond the cap
+            while len(self.sessions) > MAX_CONVERSATIONS:
+                self.sessions.popitem(last=False)
+        
+        return session_id
+    
+    def add_message(self, session_id: str, role: str, content: str):
+        """Add message to session history"""
+        if session_id in self.sessions:
+            self.sessions[session_id]["messages"].append({
+                "role": role,
+                "content": content,
+                "timestamp": time.monotonic()
+            })
+    
+    def get_history(self, session_id: str) -> list:
+        """Get session history"""
+        if session_id in self.sessions:
+            return list(self.sessions[session_id]["messages"])
+        return []
+    
+    def clear_history(self, session_id: str):
+        """Clear session history, keeping the history cap"""
+        if session_id in self.sessions:
+            self.sessions[session_id]["messages"].clear()
+
+
+# Global manager
+conversation_manager = ConversationManager()
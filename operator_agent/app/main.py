@@ -1,14 +1,19 @@
 import asyncio
 import logging
-from typing import Dict, Any
+import logging.handlers
+import queue
+from typing import Dict, Any, List, Optional
 from fastapi import FastAPI, HTTPException, WebSocket
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
-from app.agents import run_agent, get_capabilities
+from app.agents import run_agent, get_agent, get_capabilities, reset_agents
+from app.responses import ORJSONResponse
+from app.runtimes.computer_adapter import close_computer_adapter
 from app.settings import settings
 from app.startup.vectorstore_bootstrap import bootstrap_vector_store
+from app.tools.airtable_tool import close_airtable_client
 from app.websocket_fixed import handle_websocket_fixed
 
 # Configure logging
@@ -16,13 +21,47 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+
+# While the app runs, log records are emitted from a background listener so request handlers only enqueue
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_saved_root_handlers: List[logging.Handler] = []
+
+
+def _start_log_listener():
+    """Route root log records through a queue drained by a listener thread"""
+    global _log_listener, _saved_root_handlers
+    if _log_listener is not None:
+        return
+    
+    root_logger = logging.getLogger()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _saved_root_handlers = list(root_logger.handlers)
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, *_saved_root_handlers, respect_handler_level=True
+    )
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    """Restore the original root handlers and stop the listener; safe to call twice"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    
+    listener, _log_listener = _log_listener, None
+    logging.getLogger().handlers = _saved_root_handlers
+    # Drains records still queued to the original handlers
+    listener.stop()
+
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
     title="Operator Agent API",
     description="OpenAI Agents SDK with WebSearch, FileSearch, and Computer Use",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware for Next.js frontend
@@ -37,11 +76,15 @@ app.add_middleware(
 
 class RunRequest(BaseModel):
     """Request model for /run endpoint"""
+    model_config = ConfigDict(extra="ignore", frozen=True, str_max_length=1_000_000)
+    
     task: str
 
 
 class RunResponse(BaseModel):
     """Response model for /run endpoint"""
+    model_config = ConfigDict(extra="ignore", frozen=True, str_max_length=1_000_000)
+    
     result: str
     steps: list
     mode_flags: Dict[str, Any]
@@ -71,7 +114,8 @@ async def health_check() -> Dict[str, Any]:
         "airtable": capabilities["airtable"],
         "mcp": capabilities["mcp"],
         "api_key_configured": settings.has_openai,
-        "vector_store_configured": settings.has_vector_store
+        "vector_store_configured": settings.has_vector_store,
+        "bootstrapping": getattr(app.state, "bootstrapping", False)
     }
 
 
@@ -103,24 +147,41 @@ async def run_task(request: RunRequest) -> RunResponse:
         )
 
 
+async def _bootstrap_then_reset_agent():
+    """Create the vector store, then rebuild the agent so FileSearch is enabled"""
+    try:
+        logger.info("Bootstrapping vector store...")
+        store_id = await bootstrap_vector_store()
+        if store_id:
+            logger.info(f"Vector store ready: {store_id}")
+            # Reset agent to pick up new vector store
+            reset_agents()
+            await get_agent()
+    except Exception as e:
+        logger.error(f"Vector store bootstrap failed: {e}")
+    finally:
+        app.state.bootstrapping = False
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize on startup"""
+    _start_log_listener()
+    
     logger.info("Starting Operator Agent API")
     logger.info(f"OpenAI configured: {settings.has_openai}")
     logger.info(f"Vector Store configured: {settings.has_vector_store}")
     logger.info(f"Airtable configured: {settings.has_airtable}")
     logger.info(f"Computer Mode: {settings.computer_mode}")
     
-    # Bootstrap vector store if needed
+    # Build the agent now so the first request doesn't pay for it
+    if settings.has_openai:
+        await get_agent()
+    
+    # Bootstrap vector store in the background so the API is available right away
     if settings.has_openai and not settings.has_vector_store:
-        logger.info("Bootstrapping vector store...")
-        store_id = await bootstrap_vector_store()
-        if store_id:
-            logger.info(f"Vector store ready: {store_id}")
-            # Force reload settings to pick up new store ID
-            from app import agents
-            agents.agent = None  # Reset agent to pick up new vector store
+        app.state.bootstrapping = True
+        app.state.bootstrap_task = asyncio.create_task(_bootstrap_then_reset_agent())
     
     if not settings.has_openai:
         logger.warning(
@@ -129,6 +190,14 @@ async def startup_event():
         )
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown"""
+    await close_computer_adapter()
+    await close_airtable_client()
+    _stop_log_listener()
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for streaming agent responses"""
@@ -136,5 +205,17 @@ async def websocket_endpoint(websocket: WebSocket):
 
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    # Prefer uvloop/httptools/websockets when installed (not available on every dev box)
+    uvicorn.run(
+        "app.main:app" if settings.api_workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        ws="websockets" if importlib.util.find_spec("websockets") else "auto",
+        workers=settings.api_workers,
+        lifespan="on"
+    )
\ No newline at end of file
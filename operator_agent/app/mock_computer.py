@@ -9,6 +9,10 @@ from agents import Computer
 
 logger = logging.getLogger(__name__)
 
+# Minimal 1x1 transparent PNG, encoded once since it never changes
+_PNG_BYTES = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\xfb\x0c\x9d\x00\x00\x00\x00IEND\xaeB`\x82'
+_MOCK_PNG_B64_URI = "data:image/png;base64," + base64.b64encode(_PNG_BYTES).decode()
+
 
 class MockComputer(Computer):
     """Mock computer that simulates desktop actions without actually controlling anything"""
@@ -42,48 +46,42 @@ class MockComputer(Computer):
     
     def screenshot(self) -> str:
         """Return a mock screenshot as base64"""
-        # Create a simple placeholder image (1x1 transparent PNG)
         # In production, this would capture the actual screen
-        logger.info("Taking mock screenshot")
-        
-        # This is a minimal transparent PNG
-        png_data = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\xfb\x0c\x9d\x00\x00\x00\x00IEND\xaeB`\x82'
-        
-        # Return base64 encoded image
-        return f"data:image/png;base64,{base64.b64encode(png_data).decode()}"
+        logger.debug("Taking mock screenshot")
+        return _MOCK_PNG_B64_URI
     
     def click(self, x: int, y: int, button: Literal['left', 'right', 'wheel', 'back', 'forward']) -> None:
         """Simulate a click at the given coordinates"""
-        logger.info(f"Mock click at ({x}, {y}) with {button} button")
+        logger.info("Mock click at (%s, %s) with %s button", x, y, button)
         self.current_x = x
         self.current_y = y
     
     def double_click(self, x: int, y: int) -> None:
         """Simulate a double click"""
-        logger.info(f"Mock double-click at ({x}, {y})")
+        logger.info("Mock double-click at (%s, %s)", x, y)
         self.current_x = x
         self.current_y = y
     
     def move(self, x: int, y: int) -> None:
         """Move the cursor to the given coordinates"""
-        logger.info(f"Mock move cursor to ({x}, {y})")
+        logger.info("Mock move cursor to (%s, %s)", x, y)
         self.current_x = x
         self.current_y = y
     
     def drag(self, path: list[tuple[int, int]]) -> None:
         """Drag along the given path"""
-        logger.info(f"Mock drag with {len(path)} points")
+        logger.info("Mock drag with %d points", len(path))
         if path:
             self.current_x, self.current_y = path[-1]
     
     def keypress(self, keys: list[str]) -> None:
         """Simulate keypresses"""
-        logger.info(f"Mock keypress: {keys}")
+        logger.info("Mock keypress: %s", keys)
     
     def scroll(self, x: int, y: int, direction: Literal['up', 'down'], amount: int) -> None:
         """Simulate scrolling"""
-        logger.info(f"Mock scroll at ({x}, {y}): {direction} by {amount}")
+        logger.info("Mock scroll at (%s, %s): %s by %s", x, y, direction, amount)
     
     def type_text(self, text: str) -> None:
         """Type the given text"""
-        logger.info(f"Mock type text: {text[:50]}...")
\ No newline at end of file
+        logger.info("Mock type text: %.50s...", text)
\ No newline at end of file
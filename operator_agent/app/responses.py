@@ -0,0 +1,40 @@
+"""
+Shared response classes
+"""
+
+from typing import Any
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson instead of the stdlib json module"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Streaming loops yield to the event loop every N events; sends that fit the socket buffer never suspend
+YIELD_EVERY_EVENTS = 64
+
+# Constant WebSocket payloads, serialized once
+PONG_TEXT = orjson.dumps({"type": "pong"}).decode()
+HISTORY_CLEARED_TEXT = orjson.dumps({"type": "history_cleared"}).decode()
+
+
+async def send_ws_json(websocket: WebSocket, data: Any):
+    """Send JSON serialized with orjson as a text frame (the UI parses text frames)"""
+    await websocket.send_text(orjson.dumps(data).decode())
+
+
+async def receive_ws_json(websocket: WebSocket) -> Any:
+    """Receive a text or binary frame and parse it with orjson"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    
+    payload = message.get("text")
+    if payload is None:
+        payload = message.get("bytes")
+    return orjson.loads(payload)
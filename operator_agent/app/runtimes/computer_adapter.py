@@ -3,15 +3,67 @@ Computer adapter that switches between MOCK and LIVE modes
 Provides a unified interface for the ComputerTool
 """
 
+import asyncio
 import logging
 import base64
-from typing import Dict, Any, Optional, Tuple
-import httpx
+import time
+import weakref
+from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
 from app.settings import settings
-from app.runtimes.computer_stub import get_computer_stub
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+# After a failed health probe, wait this long before probing the bridge again
+_PROBE_RETRY_INTERVAL = 5.0
+
+
+class TokenBucket:
+    """Async token bucket that limits how fast requests are sent"""
+    
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second (0 disables limiting)
+            burst: Maximum tokens that can accumulate
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        if self.rate <= 0:
+            return
+        
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _BridgeState:
+    """Bridge client and limits for one event loop"""
+    
+    def __init__(self):
+        self.client: Optional["httpx.AsyncClient"] = None
+        
+        # Bound in-flight requests and request rate so a single bridge isn't flooded
+        self.sem = asyncio.Semaphore(settings.computer_bridge_max_concurrency)
+        self.bucket = TokenBucket(
+            rate=settings.computer_bridge_rps,
+            burst=settings.computer_bridge_burst
+        )
+
 
 class ComputerAdapter:
     """Adapter for computer operations that switches between MOCK and LIVE modes"""
@@ -26,43 +78,129 @@ class ComputerAdapter:
         """
         self.mode = mode or settings.computer_mode
         self.bridge_url = bridge_url or settings.computer_bridge_url
-        self.stub = get_computer_stub() if self.mode == "MOCK" else None
+        self.stub = None
+        self._live_disabled: Optional[bool] = None  # None until the bridge is probed
+        self._probe_retry_at = 0.0
+        
+        # The client, semaphore and bucket bind to the loop that first uses them,
+        # so each event loop gets its own set, keyed weakly like the cached agents
+        self._bridge_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _BridgeState]" = weakref.WeakKeyDictionary()
+        
+        if self.mode == "MOCK":
+            # Imported here so LIVE mode never loads Pillow
+            from app.runtimes.computer_stub import get_computer_stub
+            self.stub = get_computer_stub()
         
         logger.info(f"Computer adapter initialized in {self.mode} mode")
         if self.mode == "LIVE":
             logger.info(f"Bridge URL: {self.bridge_url}")
     
-    async def execute_action(self, action_type: str, **params) -> Dict[str, Any]:
+    def _bridge_state(self) -> _BridgeState:
+        """Get the running loop's bridge state, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        state = self._bridge_states.get(loop)
+        if state is None:
+            state = self._bridge_states[loop] = _BridgeState()
+        return state
+    
+    async def _get_client(self) -> "httpx.AsyncClient":
+        """Get the running loop's bridge client, creating it on first use"""
+        import httpx
+        
+        state = self._bridge_state()
+        if state.client is None or state.client.is_closed:
+            state.client = httpx.AsyncClient(
+                base_url=self.bridge_url,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        return state.client
+    
+    async def aclose(self):
+        """Close the running loop's bridge client"""
+        state = self._bridge_states.get(asyncio.get_running_loop())
+        if state is not None and state.client is not None:
+            await state.client.aclose()
+            state.client = None
+    
+    async def _probe_bridge(self):
+        """Check once whether the bridge is only the scaffold"""
+        try:
+            client = await self._get_client()
+            state = self._bridge_state()
+            async with state.sem:
+                await state.bucket.acquire()
+                response = await client.get("/health")
+            self._live_disabled = response.json().get("status") == "scaffold"
+            if self._live_disabled:
+                logger.warning("LIVE bridge is a scaffold - skipping action requests")
+        except Exception as e:
+            # Leave unprobed, but don't probe a down bridge again on every action
+            self._probe_retry_at = time.monotonic() + _PROBE_RETRY_INTERVAL
+            logger.debug(f"Bridge health probe failed: {e}")
+    
+    async def execute_action(self, action_type: str, include_screenshot: bool = True, **params) -> Dict[str, Any]:
         """
         Execute a computer action
         
         Args:
             action_type: Type of action (navigate, click, type, etc.)
+            include_screenshot: Whether to return a screenshot; intermediate
+                steps in a chain can skip it
             **params: Parameters for the action
             
         Returns:
-            Dict with result including screenshot and state
+            Dict with result including screenshot (None if skipped) and state
         """
         if self.mode == "MOCK":
-            return await self._mock_execute(action_type, params)
-        else:
-            return await self._live_execute(action_type, params)
+            return await self._mock_execute(action_type, params, include_screenshot=include_screenshot)
+        
+        result = await self._live_execute(action_type, params)
+        if not include_screenshot and "screenshot" in result:
+            result["screenshot"] = None
+        return result
     
-    async def _mock_execute(self, action_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_action_binary(self, action_type: str, **params) -> Dict[str, Any]:
+        """
+        Execute a computer action, returning the screenshot as raw PNG bytes
+        
+        Used by the WebSocket path, which sends screenshots as binary frames
+        instead of base64 inside JSON.
+        
+        Returns:
+            Dict like execute_action, with "screenshot_bytes" instead of "screenshot"
+        """
+        if self.mode == "MOCK":
+            return await self._mock_execute(action_type, params, binary=True)
+        
+        # The bridge returns base64 inside its JSON, so decode it here
+        result = await self._live_execute(action_type, params)
+        screenshot_b64 = result.pop("screenshot", None)
+        result["screenshot_bytes"] = base64.b64decode(screenshot_b64) if screenshot_b64 else None
+        return result
+    
+    async def _mock_execute(self, action_type: str, params: Dict[str, Any],
+                            binary: bool = False, include_screenshot: bool = True) -> Dict[str, Any]:
         """Execute action in MOCK mode"""
         try:
-            screenshot_bytes, state = await self.stub.execute_action(action_type, params)
+            screenshot_bytes, state = await self.stub.execute_action(
+                action_type, params, include_screenshot=include_screenshot
+            )
             
-            # Encode screenshot as base64 for JSON serialization
-            screenshot_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-            
-            return {
+            result = {
                 "success": True,
-                "screenshot": screenshot_b64,
                 "screenshot_format": "png",
                 "state": state,
                 "mode": "MOCK"
             }
+            if binary:
+                result["screenshot_bytes"] = screenshot_bytes
+            elif screenshot_bytes is None:
+                result["screenshot"] = None
+            else:
+                # Encode screenshot as base64 for JSON serialization
+                result["screenshot"] = base64.b64encode(screenshot_bytes).decode('utf-8')
+            return result
         except Exception as e:
             logger.error(f"Mock execution failed: {e}")
             return {
@@ -73,52 +211,63 @@ class ComputerAdapter:
     
     async def _live_execute(self, action_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute action in LIVE mode via HTTP bridge"""
+        import httpx
+        
+        if self._live_disabled is None and time.monotonic() >= self._probe_retry_at:
+            await self._probe_bridge()
+        
+        if self._live_disabled:
+            # Scaffold bridge answers 501 to every action, no need to ask
+            return {
+                "success": False,
+                "error": "Live mode not implemented",
+                "message": "Use COMPUTER_MODE=MOCK for testing",
+                "mode": "LIVE"
+            }
+        
         try:
-            async with httpx.AsyncClient() as client:
-                # Prepare request data
-                request_data = {
-                    "type": action_type,
-                    **params
+            client = await self._get_client()
+            
+            # Prepare request data
+            request_data = {
+                "type": action_type,
+                **params
+            }
+            
+            # Call the bridge
+            state = self._bridge_state()
+            async with state.sem:
+                await state.bucket.acquire()
+                response = await client.post("/action", json=request_data)
+            
+            if response.status_code == 501:
+                # Not implemented - expected for scaffold
+                logger.warning("LIVE bridge returned 501 Not Implemented")
+                return {
+                    "success": False,
+                    "error": "Live mode not implemented",
+                    "message": "Use COMPUTER_MODE=MOCK for testing",
+                    "mode": "LIVE"
                 }
-                
-                # Call the bridge
-                response = await client.post(
-                    f"{self.bridge_url}/action",
-                    json=request_data,
-                    timeout=30.0
-                )
-                
-                if response.status_code == 501:
-                    # Not implemented - expected for scaffold
-                    logger.warning("LIVE bridge returned 501 Not Implemented")
-                    return {
-                        "success": False,
-                        "error": "Live mode not implemented",
-                        "message": "Use COMPUTER_MODE=MOCK for testing",
-                        "mode": "LIVE"
-                    }
-                
-                if response.status_code != 200:
-                    return {
-                        "success": False,
-                        "error": f"Bridge returned {response.status_code}",
-                        "details": response.text,
-                        "mode": "LIVE"
-                    }
-                
-                # Get screenshot
-                screenshot_response = await client.get(f"{self.bridge_url}/screenshot")
-                screenshot_b64 = base64.b64encode(screenshot_response.content).decode('utf-8')
-                
-                result = response.json()
+            
+            if response.status_code != 200:
                 return {
-                    "success": result.get("success", False),
-                    "screenshot": screenshot_b64,
-                    "screenshot_format": "png",
-                    "state": result.get("state", {}),
+                    "success": False,
+                    "error": f"Bridge returned {response.status_code}",
+                    "details": response.text,
                     "mode": "LIVE"
                 }
-                
+            
+            # Screenshot comes back inline with the action result
+            result = response.json()
+            return {
+                "success": result.get("success", False),
+                "screenshot": result.get("screenshot_b64"),
+                "screenshot_format": "png",
+                "state": result.get("state", {}),
+                "mode": "LIVE"
+            }
+            
         except httpx.ConnectError:
             logger.error(f"Cannot connect to LIVE bridge at {self.bridge_url}")
             return {
@@ -143,10 +292,13 @@ class ComputerAdapter:
             return screenshot
         else:
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(f"{self.bridge_url}/screenshot")
-                    if response.status_code == 200:
-                        return response.content
+                client = await self._get_client()
+                state = self._bridge_state()
+                async with state.sem:
+                    await state.bucket.acquire()
+                    response = await client.get("/screenshot")
+                if response.status_code == 200:
+                    return response.content
             except Exception as e:
                 logger.error(f"Failed to get screenshot: {e}")
         return None
@@ -158,9 +310,12 @@ class ComputerAdapter:
             logger.info("Mock computer reset")
         else:
             try:
-                async with httpx.AsyncClient() as client:
-                    await client.post(f"{self.bridge_url}/reset")
-                    logger.info("Live bridge reset")
+                client = await self._get_client()
+                await client.post("/reset")
+                logger.info("Live bridge reset")
+                # Probe again in case a real bridge replaced the scaffold
+                self._live_disabled = None
+                self._probe_retry_at = 0.0
             except Exception as e:
                 logger.error(f"Failed to reset bridge: {e}")
     
@@ -176,7 +331,12 @@ class ComputerAdapter:
                 "scroll",
                 "screenshot"
             ],
-            "max_actions_per_run": 30
+            "max_actions_per_run": 30,
+            "max_concurrency": settings.computer_bridge_max_concurrency,
+            "rate_limit": {
+                "requests_per_second": settings.computer_bridge_rps,
+                "burst": settings.computer_bridge_burst
+            }
         }
 
 
@@ -191,6 +351,12 @@ def get_computer_adapter() -> ComputerAdapter:
     return _adapter_instance
 
 
+async def close_computer_adapter():
+    """Close the computer adapter's bridge client if one was created"""
+    if _adapter_instance is not None:
+        await _adapter_instance.aclose()
+
+
 async def computer_tool_function(action: str, **params) -> Dict[str, Any]:
     """
     Function to be used by ComputerTool
@@ -198,7 +364,8 @@ async def computer_tool_function(action: str, **params) -> Dict[str, Any]:
     This wraps the adapter for use with the OpenAI Agents SDK
     """
     adapter = get_computer_adapter()
-    result = await adapter.execute_action(action, **params)
+    include_screenshot = params.pop("include_screenshot", True)
+    result = await adapter.execute_action(action, include_screenshot=include_screenshot, **params)
     
     # Format for ComputerTool expectations
     if result.get("success"):
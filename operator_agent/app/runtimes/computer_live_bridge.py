@@ -6,12 +6,13 @@ Real browser integration would be added here later
 
 import logging
 import io
+import hashlib
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from PIL import Image, ImageDraw, ImageFont
-import uvicorn
+from pydantic import BaseModel, ConfigDict
+from app.responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +20,15 @@ logger = logging.getLogger(__name__)
 bridge_app = FastAPI(
     title="Computer Use Live Bridge",
     description="HTTP bridge for computer control actions (scaffold)",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 
 class ActionRequest(BaseModel):
     """Request model for computer actions"""
+    model_config = ConfigDict(extra="ignore", frozen=True, str_max_length=1_000_000)
+    
     type: str  # navigate, click, type, scroll, etc.
     selector: Optional[str] = None
     text: Optional[str] = None
@@ -36,9 +40,12 @@ class ActionRequest(BaseModel):
 
 class ActionResponse(BaseModel):
     """Response model for computer actions"""
+    model_config = ConfigDict(extra="ignore", frozen=True, str_max_length=1_000_000)
+    
     success: bool
     message: str
     state: Dict[str, Any]
+    screenshot_b64: str  # PNG taken after the action, so callers skip a /screenshot round trip
 
 
 @bridge_app.get("/")
@@ -89,15 +96,18 @@ async def execute_action(request: ActionRequest):
     # 1. Connect to a real browser (Playwright/Selenium)
     # 2. Execute the action
     # 3. Take a screenshot
-    # 4. Return the result
+    # 4. Return the result with the screenshot inline, e.g.
+    #    ActionResponse(..., screenshot_b64=base64.b64encode(_render_screenshot()).decode('utf-8'))
 
 
-@bridge_app.get("/screenshot")
-async def get_screenshot():
+@lru_cache(maxsize=1)
+def _render_screenshot() -> bytes:
     """
-    Get current browser screenshot
-    Returns a placeholder image for now
+    Render the current screenshot as PNG bytes
+    The scaffold placeholder never changes, so it is rendered once and cached
     """
+    from PIL import Image, ImageDraw, ImageFont
+    
     # Generate placeholder screenshot
     width, height = 1024, 640
     img = Image.new('RGB', (width, height), color='#f0f0f0')
@@ -125,12 +135,36 @@ async def get_screenshot():
     # Convert to bytes
     buffer = io.BytesIO()
     img.save(buffer, format='PNG')
-    buffer.seek(0)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=1)
+def _screenshot_etag() -> str:
+    """ETag for the cached placeholder screenshot"""
+    return f'"{hashlib.md5(_render_screenshot()).hexdigest()}"'
+
+
+@bridge_app.get("/screenshot")
+async def get_screenshot(request: Request):
+    """
+    Get current browser screenshot
+    Returns a placeholder image for now
+    """
+    etag = _screenshot_etag()
+    headers = {
+        "X-Bridge-Status": "scaffold",
+        "ETag": etag,
+        "Cache-Control": "no-cache"
+    }
+    
+    # Client already has this image
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     
     return Response(
-        content=buffer.getvalue(),
+        content=_render_screenshot(),
         media_type="image/png",
-        headers={"X-Bridge-Status": "scaffold"}
+        headers=headers
     )
 
 
@@ -145,9 +179,18 @@ async def reset_browser():
 
 def run_bridge(host: str = "127.0.0.1", port: int = 34115):
     """Run the bridge server"""
+    import importlib.util
+    import uvicorn
+    
     logger.info(f"Starting Computer Use Live Bridge on {host}:{port}")
     logger.warning("This is a scaffold - browser actions will return 501 Not Implemented")
-    uvicorn.run(bridge_app, host=host, port=port)
+    uvicorn.run(
+        bridge_app,
+        host=host,
+        port=port,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11"
+    )
 
 
 if __name__ == "__main__":
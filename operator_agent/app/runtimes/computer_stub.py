@@ -1,12 +1,151 @@
+import asyncio
 import logging
 import io
 import json
-from typing import Dict, Any, Tuple
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
 
+from app.settings import settings
+
 logger = logging.getLogger(__name__)
 
+# Layout is defined at 1024x640 and scaled onto the canvas (e.g. 0.5 for cheap CI screenshots)
+_SCALE = settings.mock_screenshot_scale
+
+
+def _s(point: Tuple[float, float]) -> Tuple[int, int]:
+    """Map a layout coordinate onto the scaled canvas"""
+    return round(point[0] * _SCALE), round(point[1] * _SCALE)
+
+
+def _load_fonts() -> Dict[str, Any]:
+    """Load the screenshot fonts once, falling back to the default font"""
+    try:
+        return {
+            key: ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", max(1, round(size * _SCALE)))
+            for key, size in (("l", 24), ("m", 18), ("s", 14))
+        }
+    except OSError:
+        default_font = ImageFont.load_default(max(1, round(10 * _SCALE)))
+        return {"l": default_font, "m": default_font, "s": default_font}
+
+
+_FONTS = _load_fonts()
+
+_WIDTH, _HEIGHT = 1024, 640
+
+# Most recent actions kept in the stub history
+_MAX_HISTORY = 1000
+
+# Body lines are 25px apart; multiline_text adds spacing on top of the font's line height
+_LINE_HEIGHT = 25
+_LINE_SPACING = round(_LINE_HEIGHT * _SCALE) - _FONTS["s"].getbbox("A")[3]
+
+
+class _ScaledDraw:
+    """ImageDraw wrapper that takes layout coordinates and draws them scaled"""
+    
+    def __init__(self, img: Image.Image):
+        self._draw = ImageDraw.Draw(img)
+    
+    def rectangle(self, xy, width: int = 1, **kwargs):
+        self._draw.rectangle([_s(point) for point in xy], width=max(1, round(width * _SCALE)), **kwargs)
+    
+    def text(self, xy, text: str, **kwargs):
+        self._draw.text(_s(xy), text, **kwargs)
+    
+    def multiline_text(self, xy, text: str, **kwargs):
+        self._draw.multiline_text(_s(xy), text, **kwargs)
+
+
+def _build_template() -> Image.Image:
+    """Pre-render the invariant screenshot chrome (header, URL bar frame, footer)"""
+    img = Image.new('RGB', _s((_WIDTH, _HEIGHT)), color='#f5f5f5')
+    draw = _ScaledDraw(img)
+    draw.rectangle([(0, 0), (_WIDTH, 60)], fill='#2563eb')
+    draw.text((20, 15), "MOCK Browser - Computer Use Simulator", fill='white', font=_FONTS["l"])
+    draw.rectangle([(20, 80), (_WIDTH-20, 120)], outline='#d1d5db', width=2)
+    draw.rectangle([(0, _HEIGHT-40), (_WIDTH, _HEIGHT)], fill='#e5e7eb')
+    return img
+
+
+_BASE_TEMPLATE = _build_template()
+
+
+@lru_cache(maxsize=1)
+def _static_png() -> bytes:
+    """Encode the bare template once for FAST_MOCK screenshots"""
+    buffer = io.BytesIO()
+    _BASE_TEMPLATE.save(buffer, format='PNG', compress_level=1, optimize=False)
+    return buffer.getvalue()
+
+
+# Each entry is up to a ~2MB RGB image, so keep the cache small
+@lru_cache(maxsize=16)
+def _render_page(action_type: str, url: str, param_items: Tuple[Tuple[str, str], ...],
+                 notes: Tuple[str, ...]) -> Image.Image:
+    """Render the page body for an action; callers must copy before drawing on it"""
+    
+    width = _WIDTH
+    img = _BASE_TEMPLATE.copy()
+    draw = _ScaledDraw(img)
+    
+    font_large, font_medium, font_small = _FONTS["l"], _FONTS["m"], _FONTS["s"]
+    
+    # Draw URL
+    draw.text((30, 90), f"URL: {url}", fill='#374151', font=font_medium)
+    
+    # Draw main content area below the action line
+    y_offset = 190
+    
+    # Show parameters
+    if param_items:
+        draw.text((30, y_offset), "Parameters:", fill='#6b7280', font=font_medium)
+        y_offset += 30
+        draw.multiline_text((50, y_offset), "\n".join(f"• {key}: {value}" for key, value in param_items),
+                            fill='#374151', font=font_small, spacing=_LINE_SPACING)
+        y_offset += _LINE_HEIGHT * len(param_items)
+    
+    # Show notes
+    if notes:
+        y_offset += 20
+        draw.text((30, y_offset), "Results:", fill='#6b7280', font=font_medium)
+        y_offset += 30
+        draw.multiline_text((50, y_offset), "\n".join(f"✓ {note}" for note in notes),
+                            fill='#059669', font=font_small, spacing=_LINE_SPACING)
+        y_offset += _LINE_HEIGHT * len(notes)
+    
+    # Add visual elements based on URL
+    if "cart" in url:
+        # Draw mock cart items
+        draw.rectangle([(width-250, 200), (width-50, 400)], outline='#10b981', width=3)
+        draw.text((width-230, 220), "Shopping Cart", fill='#10b981', font=font_medium)
+        draw.multiline_text((width-230, 250), "• Black Jacket\n• Size: Medium\n• Price: $299",
+                            fill='#374151', font=font_small, spacing=_LINE_SPACING)
+        
+        # Add to cart button (highlighted if just clicked)
+        selector = dict(param_items).get("selector", "")
+        if action_type == "click" and "cart" in selector.lower():
+            draw.rectangle([(width-230, 350), (width-70, 385)], fill='#10b981')
+            draw.text((width-180, 360), "Added to Cart!", fill='white', font=font_medium)
+        else:
+            draw.rectangle([(width-230, 350), (width-70, 385)], outline='#10b981', width=2)
+            draw.text((width-180, 360), "Add to Cart", fill='#10b981', font=font_medium)
+    
+    elif "product" in url:
+        # Draw mock product page
+        draw.rectangle([(50, 250), (350, 450)], fill='#d1d5db')
+        draw.text((150, 340), "Jacket Image", fill='#6b7280', font=font_large)
+        
+        draw.text((400, 260), "Patagonia Black Jacket", fill='#111827', font=font_large)
+        draw.text((400, 300), "$299.00", fill='#059669', font=font_medium)
+        draw.text((400, 330), "Waterproof • Breathable", fill='#6b7280', font=font_small)
+    
+    return img
+
 
 class ComputerStub:
     """Mock computer executor for testing without real browser"""
@@ -14,71 +153,87 @@ class ComputerStub:
     def __init__(self):
         self.action_count = 0
         self.current_url = "mock://home"
-        self.action_history = []
+        self.action_history = deque(maxlen=_MAX_HISTORY)
+        # Per-action state updates; unknown actions just get a generic note
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], List[str]]] = {
+            "navigate": self._h_navigate,
+            "click": self._h_click,
+            "type": self._h_type,
+            "scroll": self._h_scroll,
+        }
     
-    async def execute_action(self, action_type: str, params: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+    async def execute_action(self, action_type: str, params: Dict[str, Any],
+                             include_screenshot: bool = True) -> Tuple[Optional[bytes], Dict[str, Any]]:
         """
         Execute a mock computer action
         
         Args:
             action_type: Type of action (navigate, click, type, scroll, etc.)
             params: Parameters for the action
+            include_screenshot: Render a screenshot; skipped when False
             
         Returns:
-            Tuple of (screenshot_bytes, state_dict)
+            Tuple of (screenshot_bytes or None, state_dict)
         """
         self.action_count += 1
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
         
         # Log the action
         log_entry = {
             "action": action_type,
             "params": params,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now_iso,
             "count": self.action_count
         }
         self.action_history.append(log_entry)
-        logger.info(f"MOCK Computer Action #{self.action_count}: {action_type} - {params}")
+        logger.info("MOCK Computer Action #%d: %s - %s", self.action_count, action_type, params)
         
         # Update state based on action
-        state = self._update_state(action_type, params)
+        state = self._update_state(action_type, params, now_iso=now_iso)
         
-        # Generate mock screenshot
-        screenshot = self._generate_screenshot(action_type, params, state)
+        if not include_screenshot:
+            return None, state
         
-        return screenshot, state
-    
-    def _update_state(self, action_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Update internal state based on action"""
+        if settings.fast_mock:
+            return _static_png(), state
         
-        notes = []
+        # Render off the event loop; all stub state was updated above so this only reads its args
+        screenshot = await asyncio.to_thread(self._generate_screenshot, action_type, params, state, now)
         
-        if action_type == "navigate":
-            self.current_url = params.get("url", "mock://unknown")
-            notes.append(f"Navigated to {self.current_url}")
+        return screenshot, state
+    
+    def _h_navigate(self, params: Dict[str, Any]) -> List[str]:
+        self.current_url = params.get("url", "mock://unknown")
+        return [f"Navigated to {self.current_url}"]
+    
+    def _h_click(self, params: Dict[str, Any]) -> List[str]:
+        selector = params.get("selector", "unknown")
+        notes = [f"Clicked on {selector}"]
         
-        elif action_type == "click":
-            selector = params.get("selector", "unknown")
-            notes.append(f"Clicked on {selector}")
-            
-            # Simulate navigation after click
-            if "cart" in selector.lower():
-                self.current_url = "mock://cart"
-                notes.append("Navigated to cart page")
-            elif "jacket" in selector.lower():
-                self.current_url = "mock://product/jacket"
-                notes.append("Viewing jacket product page")
-        
-        elif action_type == "type":
-            text = params.get("text", "")
-            selector = params.get("selector", "unknown")
-            notes.append(f"Typed '{text}' into {selector}")
-        
-        elif action_type == "scroll":
-            direction = params.get("direction", "down")
-            notes.append(f"Scrolled {direction}")
+        # Simulate navigation after click
+        if "cart" in selector.lower():
+            self.current_url = "mock://cart"
+            notes.append("Navigated to cart page")
+        elif "jacket" in selector.lower():
+            self.current_url = "mock://product/jacket"
+            notes.append("Viewing jacket product page")
+        return notes
+    
+    def _h_type(self, params: Dict[str, Any]) -> List[str]:
+        text = params.get("text", "")
+        selector = params.get("selector", "unknown")
+        return [f"Typed '{text}' into {selector}"]
+    
+    def _h_scroll(self, params: Dict[str, Any]) -> List[str]:
+        direction = params.get("direction", "down")
+        return [f"Scrolled {direction}"]
+    
+    def _update_state(self, action_type: str, params: Dict[str, Any], now_iso: Optional[str] = None) -> Dict[str, Any]:
+        """Update internal state based on action"""
         
-        else:
-            notes.append(f"Performed {action_type} action")
+        handler = self._handlers.get(action_type)
+        notes = handler(params) if handler else [f"Performed {action_type} action"]
         
         return {
             "url": self.current_url,
@@ -86,106 +241,42 @@ class ComputerStub:
             "last_action": action_type,
             "notes": notes,
             "success": True,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now_iso or datetime.utcnow().isoformat()
         }
     
-    def _generate_screenshot(self, action_type: str, params: Dict[str, Any], state: Dict[str, Any]) -> bytes:
+    def _generate_screenshot(self, action_type: str, params: Dict[str, Any], state: Dict[str, Any],
+                             now: Optional[datetime] = None) -> bytes:
         """Generate a mock screenshot PNG"""
+        now = now or datetime.utcnow()
         
-        # Create image
-        width, height = 1024, 640
-        img = Image.new('RGB', (width, height), color='#f5f5f5')
-        draw = ImageDraw.Draw(img)
-        
-        # Try to use a basic font, fall back to default if not available
-        try:
-            font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 24)
-            font_medium = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
-            font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-        except:
-            # Fall back to default font
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-        
-        # Draw header
-        draw.rectangle([(0, 0), (width, 60)], fill='#2563eb')
-        draw.text((20, 15), "MOCK Browser - Computer Use Simulator", fill='white', font=font_large)
-        
-        # Draw URL bar
-        draw.rectangle([(20, 80), (width-20, 120)], outline='#d1d5db', width=2)
-        draw.text((30, 90), f"URL: {state['url']}", fill='#374151', font=font_medium)
-        
-        # Draw main content area
-        y_offset = 150
+        # Reuse the rendered page for repeated actions; only the counter and clock change
+        param_items = tuple((key, str(value)) for key, value in params.items())
+        img = _render_page(action_type, state['url'], param_items, tuple(state.get('notes', ()))).copy()
+        draw = _ScaledDraw(img)
         
         # Show action performed
-        draw.text((30, y_offset), f"Action #{self.action_count}: {action_type.upper()}", 
-                 fill='#059669', font=font_large)
-        y_offset += 40
-        
-        # Show parameters
-        if params:
-            draw.text((30, y_offset), "Parameters:", fill='#6b7280', font=font_medium)
-            y_offset += 30
-            for key, value in params.items():
-                draw.text((50, y_offset), f"• {key}: {value}", fill='#374151', font=font_small)
-                y_offset += 25
-        
-        # Show notes
-        if state.get('notes'):
-            y_offset += 20
-            draw.text((30, y_offset), "Results:", fill='#6b7280', font=font_medium)
-            y_offset += 30
-            for note in state['notes']:
-                draw.text((50, y_offset), f"✓ {note}", fill='#059669', font=font_small)
-                y_offset += 25
-        
-        # Draw footer
-        draw.rectangle([(0, height-40), (width, height)], fill='#e5e7eb')
-        draw.text((20, height-30), f"Mock Mode | Actions: {self.action_count} | Time: {datetime.now().strftime('%H:%M:%S')}", 
-                 fill='#6b7280', font=font_small)
-        
-        # Add visual elements based on URL
-        if "cart" in state['url']:
-            # Draw mock cart items
-            draw.rectangle([(width-250, 200), (width-50, 400)], outline='#10b981', width=3)
-            draw.text((width-230, 220), "Shopping Cart", fill='#10b981', font=font_medium)
-            draw.text((width-230, 250), "• Black Jacket", fill='#374151', font=font_small)
-            draw.text((width-230, 275), "• Size: Medium", fill='#374151', font=font_small)
-            draw.text((width-230, 300), "• Price: $299", fill='#374151', font=font_small)
-            
-            # Add to cart button (highlighted if just clicked)
-            if action_type == "click" and "cart" in str(params.get("selector", "")).lower():
-                draw.rectangle([(width-230, 350), (width-70, 385)], fill='#10b981')
-                draw.text((width-180, 360), "Added to Cart!", fill='white', font=font_medium)
-            else:
-                draw.rectangle([(width-230, 350), (width-70, 385)], outline='#10b981', width=2)
-                draw.text((width-180, 360), "Add to Cart", fill='#10b981', font=font_medium)
-        
-        elif "product" in state['url']:
-            # Draw mock product page
-            draw.rectangle([(50, 250), (350, 450)], fill='#d1d5db')
-            draw.text((150, 340), "Jacket Image", fill='#6b7280', font=font_large)
-            
-            draw.text((400, 260), "Patagonia Black Jacket", fill='#111827', font=font_large)
-            draw.text((400, 300), "$299.00", fill='#059669', font=font_medium)
-            draw.text((400, 330), "Waterproof • Breathable", fill='#6b7280', font=font_small)
+        draw.text((30, 150), f"Action #{state['action_count']}: {action_type.upper()}", 
+                 fill='#059669', font=_FONTS["l"])
+        
+        # Draw footer text
+        draw.text((20, _HEIGHT-30), f"Mock Mode | Actions: {state['action_count']} | Time: {now.strftime('%H:%M:%S')}", 
+                 fill='#6b7280', font=_FONTS["s"])
         
         # Convert to bytes
         buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
+        # Mock screenshots are ephemeral; favour encode speed over size
+        img.save(buffer, format='PNG', compress_level=1, optimize=False)
         return buffer.getvalue()
     
     def get_history(self) -> list:
         """Get action history"""
-        return self.action_history
+        return list(self.action_history)
     
     def reset(self):
         """Reset the stub state"""
         self.action_count = 0
         self.current_url = "mock://home"
-        self.action_history = []
+        self.action_history = deque(maxlen=_MAX_HISTORY)
         logger.info("Computer stub reset")
 
 
@@ -1,16 +1,86 @@
 import os
 import json
+import logging
 from pathlib import Path
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
+try:
+    import orjson
+    
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+    
+    _loads = json.loads
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 STATE_DIR = Path(".state")
 STATE_FILE = STATE_DIR / "operator_agent.json"
 
+# Parsed state file contents, read once and written through
+_state_cache: Optional[dict] = None
+
+# Skip the access-time update on reads (Linux only; the kernel refuses it for files we don't own)
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+# Level names accepted for log level settings
+_LOG_LEVELS = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG")
+
+
+def _env_log_level(name: str, default: str = "INFO") -> str:
+    """Read a log level name from the environment, falling back to the default if unknown"""
+    value = os.getenv(name, default).upper()
+    if value not in _LOG_LEVELS:
+        logger.warning("Unknown %s value %r, using %s", name, value, default)
+        return default
+    return value
+
+
+def read_json_file(path) -> dict:
+    """Read a small JSON file with a single read() and parse the bytes"""
+    try:
+        fd = os.open(path, os.O_RDONLY | _O_NOATIME)
+    except PermissionError:
+        fd = os.open(path, os.O_RDONLY)
+    try:
+        data = os.read(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+    return _loads(data)
+
+
+def _read_state() -> dict:
+    """Read the state file once and return the cached dict"""
+    global _state_cache
+    if _state_cache is None:
+        _state_cache = {}
+        if STATE_FILE.exists():
+            try:
+                _state_cache = read_json_file(STATE_FILE)
+            except Exception:
+                pass
+    return _state_cache
+
+
+def _write_state(state: dict):
+    """Atomically write the state file and update the cache"""
+    global _state_cache
+    STATE_DIR.mkdir(exist_ok=True)
+    tmp_path = STATE_FILE.with_suffix(".json.tmp")
+    tmp_path.write_bytes(_dumps(state))
+    os.replace(tmp_path, STATE_FILE)
+    _state_cache = state
+
 
 @dataclass
 class Settings:
@@ -28,6 +98,24 @@ class Settings:
     # Computer Use
     computer_mode: str = "MOCK"  # MOCK | LIVE
     computer_bridge_url: str = "http://127.0.0.1:34115"
+    computer_bridge_max_concurrency: int = 8
+    computer_bridge_rps: float = 10.0
+    computer_bridge_burst: int = 20
+    mock_screenshot_scale: float = 1.0  # MOCK screenshots only; LIVE returns real browser output
+    fast_mock: bool = False  # MOCK returns one static screenshot instead of rendering
+    
+    # Server
+    api_workers: int = 1
+    max_history: int = 200  # Messages kept per WebSocket session
+    ws_log_level: str = "INFO"
+    
+    # Bumped on every change so callers can cache derived values
+    version: int = field(default=0, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name != "version":
+            super().__setattr__("version", getattr(self, "version", 0) + 1)
     
     @classmethod
     def load(cls) -> "Settings":
@@ -39,34 +127,28 @@ class Settings:
             airtable_base_id=os.getenv("AIRTABLE_BASE_ID"),
             airtable_table_name=os.getenv("AIRTABLE_TABLE_NAME", "TestTable"),
             computer_mode=os.getenv("COMPUTER_MODE", "MOCK"),
-            computer_bridge_url=os.getenv("COMPUTER_BRIDGE_URL", "http://127.0.0.1:34115")
+            computer_bridge_url=os.getenv("COMPUTER_BRIDGE_URL", "http://127.0.0.1:34115"),
+            computer_bridge_max_concurrency=int(os.getenv("COMPUTER_BRIDGE_MAX_CONCURRENCY", "8")),
+            computer_bridge_rps=float(os.getenv("COMPUTER_BRIDGE_RPS", "10")),
+            computer_bridge_burst=int(os.getenv("COMPUTER_BRIDGE_BURST", "20")),
+            mock_screenshot_scale=float(os.getenv("MOCK_SCREENSHOT_SCALE", "1.0")),
+            fast_mock=os.getenv("FAST_MOCK", "").lower() in ("1", "true", "yes"),
+            api_workers=int(os.getenv("API_WORKERS", "1")),
+            max_history=int(os.getenv("MAX_HISTORY", "200")),
+            ws_log_level=_env_log_level("WS_LOG_LEVEL")
         )
         
         # Load vector store ID from state if not in env
-        if not settings.openai_vector_store_id and STATE_FILE.exists():
-            try:
-                with open(STATE_FILE) as f:
-                    state = json.load(f)
-                    settings.openai_vector_store_id = state.get("vector_store_id")
-            except Exception:
-                pass
+        if not settings.openai_vector_store_id:
+            settings.openai_vector_store_id = _read_state().get("vector_store_id")
         
         return settings
     
     def save_vector_store_id(self, store_id: str):
         """Persist vector store ID to state file"""
-        STATE_DIR.mkdir(exist_ok=True)
-        state = {}
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE) as f:
-                    state = json.load(f)
-            except Exception:
-                pass
-        
+        state = dict(_read_state())
         state["vector_store_id"] = store_id
-        with open(STATE_FILE, "w") as f:
-            json.dump(state, f, indent=2)
+        _write_state(state)
         
         self.openai_vector_store_id = store_id
     
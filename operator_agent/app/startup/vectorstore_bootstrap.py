@@ -1,7 +1,7 @@
+import hashlib
+import io
 import logging
-import tempfile
-from typing import Optional
-from pathlib import Path
+from typing import Optional, Tuple
 
 from app.settings import settings
 
@@ -32,6 +32,9 @@ DOCUMENTS = {
 """
 }
 
+# Encoded once so uploads can wrap the bytes directly
+_DOCUMENT_BYTES = {filename: content.encode('utf-8') for filename, content in DOCUMENTS.items()}
+
 
 async def create_vector_store() -> Optional[str]:
     """Create a new vector store and upload test documents"""
@@ -41,79 +44,51 @@ async def create_vector_store() -> Optional[str]:
     
     try:
         # Import OpenAI client
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.openai_api_key)
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
         
         # Create vector store
         logger.info("Creating new vector store...")
         
         # For compatibility, try the vector store API
         try:
-            vector_store = client.beta.vector_stores.create(
+            vector_store = await client.beta.vector_stores.create(
                 name="Operator Agent Knowledge Base"
             )
             store_id = vector_store.id
-            logger.info(f"Created vector store: {store_id}")
+            logger.info("Created vector store: %s", store_id)
         except AttributeError:
             # If vector stores API not available, use mock for testing
             logger.warning("Vector stores API not available - using mock ID for testing")
-            store_id = "vs_mock_" + str(abs(hash(settings.openai_api_key)))[:12]
-            logger.info(f"Using mock vector store ID: {store_id}")
+            # Deterministic across runs so the saved state file is reused on restart
+            store_id = "vs_mock_" + hashlib.blake2b(settings.openai_api_key.encode(), digest_size=6).hexdigest()
+            logger.info("Using mock vector store ID: %s", store_id)
             
             # Skip file upload for mock
             settings.save_vector_store_id(store_id)
             return store_id
         
-        # Create temporary files for upload
-        temp_files = []
-        file_streams = []
-        
-        try:
-            for filename, content in DOCUMENTS.items():
-                # Create temp file
-                temp_file = tempfile.NamedTemporaryFile(
-                    mode='w',
-                    suffix=f'.{filename.split(".")[-1]}',
-                    delete=False
-                )
-                temp_file.write(content)
-                temp_file.close()
-                temp_files.append(temp_file.name)
-                
-                # Upload to OpenAI
-                logger.info(f"Uploading {filename}...")
-                with open(temp_file.name, 'rb') as f:
-                    file_obj = client.files.create(
-                        file=f,
-                        purpose='assistants'
-                    )
-                    file_streams.append(file_obj)
-            
-            # Add files to vector store
-            if file_streams:
-                logger.info(f"Adding {len(file_streams)} files to vector store...")
-                for file_obj in file_streams:
-                    client.beta.vector_stores.files.create(
-                        vector_store_id=store_id,
-                        file_id=file_obj.id
-                    )
-                logger.info("Files added successfully")
-            
-        finally:
-            # Clean up temp files
-            for temp_file in temp_files:
-                try:
-                    Path(temp_file).unlink()
-                except Exception:
-                    pass
+        # Upload all documents concurrently from memory and attach them as one batch
+        streams = [
+            (filename, io.BytesIO(data))
+            for filename, data in _DOCUMENT_BYTES.items()
+        ]
+        if streams:
+            logger.info("Uploading %d files to vector store...", len(streams))
+            await client.beta.vector_stores.file_batches.upload_and_poll(
+                vector_store_id=store_id,
+                files=streams,
+                max_concurrency=len(streams)
+            )
+            logger.info("Files added successfully")
         
         # Save the store ID
         settings.save_vector_store_id(store_id)
-        logger.info(f"Vector store {store_id} created and saved")
+        logger.info("Vector store %s created and saved", store_id)
         return store_id
         
     except Exception as e:
-        logger.error(f"Failed to create vector store: {e}")
+        logger.error("Failed to create vector store: %s", e)
         return None
 
 
@@ -121,7 +96,7 @@ async def bootstrap_vector_store() -> Optional[str]:
     """Bootstrap vector store - create if needed or return existing"""
     # Check if already configured
     if settings.has_vector_store:
-        logger.info(f"Using existing vector store: {settings.openai_vector_store_id}")
+        logger.info("Using existing vector store: %s", settings.openai_vector_store_id)
         return settings.openai_vector_store_id
     
     # Check if API key available
@@ -134,18 +109,22 @@ async def bootstrap_vector_store() -> Optional[str]:
     store_id = await create_vector_store()
     
     if store_id:
-        logger.info(f"Vector store ready: {store_id}")
+        logger.info("Vector store ready: %s", store_id)
     else:
         logger.warning("Vector store creation failed - FileSearch disabled")
     
     return store_id
 
 
-def get_test_queries() -> list:
+# Sample FileSearch queries; a tuple so every caller can share it
+_TEST_QUERIES = (
+    "What are the jacket preferences in our documentation?",
+    "Where can I shop for Patagonia in Tokyo?",
+    "What's the budget range for jackets?",
+    "Which Tokyo neighborhoods have outdoor shops?"
+)
+
+
+def get_test_queries() -> Tuple[str, ...]:
     """Get sample queries for testing FileSearch"""
-    return [
-        "What are the jacket preferences in our documentation?",
-        "Where can I shop for Patagonia in Tokyo?",
-        "What's the budget range for jackets?",
-        "Which Tokyo neighborhoods have outdoor shops?"
-    ]
\ No newline at end of file
+    return _TEST_QUERIES
\ No newline at end of file
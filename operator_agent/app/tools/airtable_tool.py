@@ -1,10 +1,62 @@
+import asyncio
 import logging
-import json
+import random
+import weakref
 from typing import Dict, Any, Optional
 import httpx
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Retry policy for 429/5xx responses
+_MAX_ATTEMPTS = 3
+_INITIAL_BACKOFF = 0.5
+_MAX_BACKOFF = 4.0
+
+# Shared clients so Airtable calls reuse pooled keep-alive connections; a client is bound
+# to the loop that opened it, so they are keyed weakly by event loop like the cached agents
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """Get the running loop's Airtable client, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20)
+        )
+    return client
+
+
+async def _post_with_retry(client: httpx.AsyncClient, url: str, headers: Dict[str, str],
+                           data: Dict[str, Any]) -> httpx.Response:
+    """POST to Airtable, retrying rate-limit and server errors with jittered backoff"""
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        response = await client.post(url, headers=headers, content=orjson.dumps(data))
+        retryable = response.status_code == 429 or response.status_code >= 500
+        if not retryable or attempt == _MAX_ATTEMPTS:
+            return response
+        
+        # Honour Retry-After when Airtable sends it, otherwise back off exponentially
+        retry_after = response.headers.get("Retry-After")
+        try:
+            delay = min(float(retry_after), _MAX_BACKOFF) if retry_after else None
+        except ValueError:
+            delay = None
+        if delay is None:
+            delay = min(_INITIAL_BACKOFF * 2 ** (attempt - 1), _MAX_BACKOFF) + random.uniform(0, _INITIAL_BACKOFF)
+        logger.warning("Airtable returned %d, retrying in %.2fs (attempt %d)", response.status_code, delay, attempt)
+        await asyncio.sleep(delay)
+
+
+async def close_airtable_client():
+    """Close the running loop's Airtable client if one was created"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 
 def create_airtable_tool(settings) -> Optional[Dict[str, Any]]:
     """Create an Airtable function tool if configured"""
@@ -12,6 +64,12 @@ def create_airtable_tool(settings) -> Optional[Dict[str, Any]]:
     if not settings.has_airtable:
         return None
     
+    url = f"https://api.airtable.com/v0/{settings.airtable_base_id}/{settings.airtable_table_name}"
+    headers = {
+        "Authorization": f"Bearer {settings.airtable_api_key}",
+        "Content-Type": "application/json"
+    }
+    
     async def upsert_airtable_record(payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Upsert a record to Airtable
@@ -22,12 +80,6 @@ def create_airtable_tool(settings) -> Optional[Dict[str, Any]]:
         Returns:
             Dict with status and response or error message
         """
-        url = f"https://api.airtable.com/v0/{settings.airtable_base_id}/{settings.airtable_table_name}"
-        headers = {
-            "Authorization": f"Bearer {settings.airtable_api_key}",
-            "Content-Type": "application/json"
-        }
-        
         # Add timestamp if not present
         if "timestamp" not in payload:
             from datetime import datetime
@@ -39,32 +91,32 @@ def create_airtable_tool(settings) -> Optional[Dict[str, Any]]:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=headers, json=data)
+            client = await _get_client()
+            response = await _post_with_retry(client, url, headers, data)
+            
+            if response.status_code == 200 or response.status_code == 201:
+                result = response.json()
+                logger.info("Airtable record created: %s", result.get('id'))
+                return {
+                    "status": "success",
+                    "record_id": result.get("id"),
+                    "message": "Record successfully added to Airtable"
+                }
+            else:
+                logger.warning("Airtable API error: %d - %s", response.status_code, response.text)
+                return {
+                    "status": "error",
+                    "message": f"Airtable API returned {response.status_code}: {response.text[:200]}"
+                }
                 
-                if response.status_code == 200 or response.status_code == 201:
-                    result = response.json()
-                    logger.info(f"Airtable record created: {result.get('id')}")
-                    return {
-                        "status": "success",
-                        "record_id": result.get("id"),
-                        "message": "Record successfully added to Airtable"
-                    }
-                else:
-                    logger.warning(f"Airtable API error: {response.status_code} - {response.text}")
-                    return {
-                        "status": "error",
-                        "message": f"Airtable API returned {response.status_code}: {response.text[:200]}"
-                    }
-                    
         except httpx.NetworkError as e:
-            logger.error(f"Network error calling Airtable: {e}")
+            logger.error("Network error calling Airtable: %s", e)
             return {
                 "status": "error",
                 "message": f"Network error: Could not reach Airtable API"
             }
         except Exception as e:
-            logger.error(f"Unexpected error with Airtable: {e}")
+            logger.error("Unexpected error with Airtable: %s", e)
             return {
                 "status": "error",
                 "message": f"Unexpected error: {str(e)}"
@@ -108,7 +160,7 @@ def register_airtable_tool(agent, settings):
             logger.info("Airtable tool registered with agent")
             return True
         except Exception as e:
-            logger.warning(f"Could not register Airtable tool: {e}")
+            logger.warning("Could not register Airtable tool: %s", e)
             return False
     
     return False
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+
+logger = logging.getLogger(__name__)
+
+
+def create_batch_tool(available_tools: Dict[str, Callable[..., Awaitable[Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Create a batch function tool that runs several local tool calls at once
+    
+    Args:
+        available_tools: Mapping of tool name to the async function behind it
+    
+    Returns:
+        Function tool definition, or None if there is nothing to batch
+    """
+    
+    if not available_tools:
+        return None
+    
+    async def _invoke(invocation: Dict[str, Any]) -> Any:
+        tool_name = invocation.get("tool_name")
+        function = available_tools.get(tool_name)
+        if function is None:
+            raise ValueError(f"Unknown tool: {tool_name}")
+        return await function(**invocation.get("arguments", {}))
+    
+    async def batch(invocations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run independent tool invocations concurrently
+        
+        Args:
+            invocations: List of {"tool_name": ..., "arguments": {...}}
+        
+        Returns:
+            One result entry per invocation, in the same order
+        """
+        logger.info("Running batch of %d tool calls", len(invocations))
+        results = await asyncio.gather(
+            *(_invoke(invocation) for invocation in invocations),
+            return_exceptions=True
+        )
+        
+        batch_results = []
+        for invocation, result in zip(invocations, results):
+            if isinstance(result, Exception):
+                logger.warning("Batched call to %s failed: %s", invocation.get("tool_name"), result)
+                batch_results.append({
+                    "tool_name": invocation.get("tool_name"),
+                    "status": "error",
+                    "message": str(result)
+                })
+            else:
+                batch_results.append({
+                    "tool_name": invocation.get("tool_name"),
+                    "status": "success",
+                    "result": result
+                })
+        return batch_results
+    
+    # Return as a function tool definition
+    return {
+        "name": "batch",
+        "description": (
+            "Run several independent tool calls at once. "
+            f"Available tools: {', '.join(sorted(available_tools))}"
+        ),
+        "function": batch,
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "invocations": {
+                    "type": "array",
+                    "description": "Tool calls to run concurrently",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool_name": {
+                                "type": "string",
+                                "enum": sorted(available_tools)
+                            },
+                            "arguments": {
+                                "type": "object",
+                                "description": "Keyword arguments for the tool"
+                            }
+                        },
+                        "required": ["tool_name", "arguments"]
+                    }
+                }
+            },
+            "required": ["invocations"]
+        }
+    }
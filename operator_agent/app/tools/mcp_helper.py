@@ -1,3 +1,4 @@
+import functools
 import logging
 import subprocess
 import shutil
@@ -7,17 +8,23 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
 def check_npm_available() -> bool:
-    """Check if npm is installed and available"""
+    """Check if npm is installed and available (cached; use cache_clear() to re-check)"""
+    npm_path = shutil.which("npm")
+    if npm_path is None:
+        logger.warning("npm not found - MCP features will be disabled")
+        return False
+    
     try:
         result = subprocess.run(
-            ["npm", "--version"],
+            [npm_path, "--version"],
             capture_output=True,
             text=True,
             timeout=5
         )
         if result.returncode == 0:
-            logger.info(f"npm available: v{result.stdout.strip()}")
+            logger.info("npm available: v%s", result.stdout.strip())
             return True
     except (subprocess.SubprocessError, FileNotFoundError):
         pass
@@ -46,7 +53,7 @@ def create_mcp_filesystem_server(sandbox_dir: str = "./sandbox") -> Optional[Any
         # Try importing MCP support from agents SDK
         from agents.mcp import MCPServerStdio
         
-        logger.info(f"Starting MCP filesystem server in {sandbox_dir}")
+        logger.info("Starting MCP filesystem server in %s", sandbox_dir)
         
         # Create the MCP server with absolute path
         import os
@@ -63,14 +70,14 @@ def create_mcp_filesystem_server(sandbox_dir: str = "./sandbox") -> Optional[Any
             }
         )
         
-        logger.info(f"MCP filesystem server configured for {abs_sandbox}")
+        logger.info("MCP filesystem server configured for %s", abs_sandbox)
         return mcp_server
         
     except ImportError as e:
-        logger.warning(f"MCP support not available in agents SDK: {e}")
+        logger.warning("MCP support not available in agents SDK: %s", e)
         return None
     except Exception as e:
-        logger.warning(f"Failed to start MCP server: {e}")
+        logger.warning("Failed to start MCP server: %s", e)
         return None
 
 
@@ -100,12 +107,12 @@ def create_filtered_mcp_server(sandbox_dir: str = "./sandbox",
         server.tool_filter = create_static_tool_filter(
             allowed_tool_names=allowed_tools
         )
-        logger.info(f"MCP server filtered to: {allowed_tools}")
+        logger.info("MCP server filtered to: %s", allowed_tools)
         
     except ImportError:
         logger.warning("Tool filtering not available - using unfiltered MCP")
     except Exception as e:
-        logger.warning(f"Could not apply tool filter: {e}")
+        logger.warning("Could not apply tool filter: %s", e)
     
     return server
 
@@ -3,48 +3,72 @@ WebSocket support for streaming agent responses
 """
 
 import asyncio
-import json
 import logging
-from typing import Dict, Any, Optional
+import re
+import orjson
+from typing import Dict, Any
 from fastapi import WebSocket, WebSocketDisconnect
 from app.agents import run_agent
+from app.responses import PONG_TEXT, receive_ws_json, send_ws_json
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Task keywords that trigger simulated tool-call notifications, matched in one pass
+_ROUTE_RE = re.compile(r"\b(search|open|click|navigate)\b", re.IGNORECASE)
+
+# A word plus its trailing whitespace
+_WORD_RE = re.compile(r"\S+\s*")
+
+# Maximum number of concurrent sends per broadcast batch
+BROADCAST_BATCH_SIZE = 50
+
 
 class ConnectionManager:
     """Manage WebSocket connections"""
     
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.active_connections: set[WebSocket] = set()
     
     async def connect(self, websocket: WebSocket):
         """Accept and track a new connection"""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         """Remove a disconnected client"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
         logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
     
     async def send_json(self, websocket: WebSocket, data: Dict[str, Any]):
         """Send JSON data to a specific client"""
         try:
-            await websocket.send_json(data)
+            await send_ws_json(websocket, data)
         except Exception as e:
             logger.error(f"Error sending message: {e}")
     
     async def broadcast(self, data: Dict[str, Any]):
         """Send data to all connected clients"""
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting: {e}")
+        # Serialize once and reuse the same frame for every client
+        payload = orjson.dumps(data).decode()
+        connections = list(self.active_connections)
+        
+        # Send in bounded batches, yielding to the event loop between them
+        for start in range(0, len(connections), BROADCAST_BATCH_SIZE):
+            batch = connections[start:start + BROADCAST_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(connection.send_text(payload) for connection in batch),
+                return_exceptions=True
+            )
+            
+            # Drop clients whose send failed
+            for connection, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error broadcasting: {result}")
+                    self.disconnect(connection)
+            
+            await asyncio.sleep(0)
 
 
 # Global connection manager
@@ -66,7 +90,8 @@ async def stream_agent_response(websocket: WebSocket, task: str):
         })
         
         # Simulate tool call notifications
-        if "search" in task.lower():
+        kinds = {match.group(1).lower() for match in _ROUTE_RE.finditer(task)}
+        if "search" in kinds:
             await manager.send_json(websocket, {
                 "type": "tool_call",
                 "tool": {
@@ -77,7 +102,7 @@ async def stream_agent_response(websocket: WebSocket, task: str):
             })
             await asyncio.sleep(0.5)  # Simulate processing
         
-        if any(word in task.lower() for word in ["open", "click", "navigate"]):
+        if kinds & {"open", "click", "navigate"}:
             await manager.send_json(websocket, {
                 "type": "tool_call",
                 "tool": {
@@ -91,20 +116,23 @@ async def stream_agent_response(websocket: WebSocket, task: str):
         # Run the actual agent
         result = await run_agent(task)
         
-        # Stream the response text word by word
-        words = result["final_text"].split()
+        # Stream the response text a few words at a time, slicing the original string
+        text = result["final_text"]
+        words = list(_WORD_RE.finditer(text))
         chunk_size = 3  # Words per chunk
         
         for i in range(0, len(words), chunk_size):
-            chunk = " ".join(words[i:i+chunk_size])
+            last = words[min(i + chunk_size, len(words)) - 1]
             await manager.send_json(websocket, {
                 "type": "text",
-                "content": chunk + " "
+                "content": text[words[i].start():last.end()]
             })
-            await asyncio.sleep(0.05)  # Small delay for streaming effect
         
         # Send screenshots if Computer Use was involved
-        if result.get("computer_mode") and any(tc["name"] == "ComputerTool" for tc in result.get("tool_calls", [])):
+        tool_names = result.get("tool_names")
+        if tool_names is None:
+            tool_names = {tc.get("name") for tc in result.get("tool_calls", ())}
+        if result.get("computer_mode") and "ComputerTool" in tool_names:
             # In a real implementation, get actual screenshots from computer adapter
             await manager.send_json(websocket, {
                 "type": "screenshot",
@@ -139,7 +167,7 @@ async def handle_websocket(websocket: WebSocket):
     try:
         while True:
             # Wait for messages from client
-            data = await websocket.receive_json()
+            data = await receive_ws_json(websocket)
             
             if data.get("type") == "task":
                 task = data.get("task", "")
@@ -149,7 +177,7 @@ async def handle_websocket(websocket: WebSocket):
             
             elif data.get("type") == "ping":
                 # Respond to ping with pong
-                await manager.send_json(websocket, {"type": "pong"})
+                await websocket.send_text(PONG_TEXT)
             
             elif data.get("type") == "close":
                 break
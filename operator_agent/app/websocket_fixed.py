@@ -5,70 +5,231 @@ Fixed WebSocket streaming support using OpenAI Agents SDK
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional
+import orjson
+from typing import Dict, Any, List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from agents import Runner
+from app.conversation import conversation_manager
+from app.responses import HISTORY_CLEARED_TEXT, PONG_TEXT, YIELD_EVERY_EVENTS, receive_ws_json, send_ws_json
 from app.settings import settings
 
-# Set logging to DEBUG for WebSocket debugging
-logging.basicConfig(level=logging.DEBUG)
+# Level is configurable so WebSocket debugging can be enabled without forcing DEBUG globally
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(settings.ws_log_level)
 
+# Flush batched text deltas once this many characters are pending or this many seconds pass
+_DELTA_FLUSH_CHARS = 512
+_DELTA_FLUSH_INTERVAL = 0.02
 
-class ConversationManager:
-    """Manage conversation sessions"""
-    
-    def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+# tool_call frames are this fixed envelope around the serialized tool dict
+_TOOL_CALL_PREFIX = '{"type":"tool_call","tool":'
+
+
+class _StreamState:
+    """Accumulated text and tool calls for one streamed response"""
     
-    def get_or_create_session(self, session_id: str = None) -> str:
-        """Get or create session"""
-        if not session_id:
-            # Generate a simple incrementing ID for now
-            session_id = f"session-{len(self.sessions) + 1}"
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.full_response = ""
+        self.tool_calls: List[Dict[str, Any]] = []
         
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
-                "id": session_id,
-                "messages": [],
-                "created_at": asyncio.get_event_loop().time()
-            }
-            logger.info(f"Created new session: {session_id}")
+        # Text deltas are coalesced and flushed by size or age to cut per-token frames
+        self.pending: List[str] = []
+        self.pending_len = 0
+        self.loop = asyncio.get_running_loop()
+        self.last_flush = self.loop.time()
         
-        return session_id
+        # A timer flushes pending text during pauses in the event stream
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_flush: Optional[asyncio.Task] = None
+    
+    def add_text(self, text: str):
+        """Record streamed text and queue it for the next flush"""
+        self.full_response += text
+        self.pending.append(text)
+        self.pending_len += len(text)
+        # At most one timer flush is armed or running at a time, so timer sends never overlap
+        if self._timer is None and (self._timer_flush is None or self._timer_flush.done()):
+            self._timer = self.loop.call_later(_DELTA_FLUSH_INTERVAL, self._on_timer)
     
-    def add_message(self, session_id: str, role: str, content: str):
-        """Add message to session history"""
-        if session_id in self.sessions:
-            self.sessions[session_id]["messages"].append({
-                "role": role,
-                "content": content,
-                "timestamp": asyncio.get_event_loop().time()
+    def _on_timer(self):
+        self._timer = None
+        self._timer_flush = self.loop.create_task(self._flush_on_timer())
+    
+    async def _flush_on_timer(self):
+        await self.flush()
+        # Text that arrived while this send was in flight gets its own timer
+        if self.pending and self._timer is None:
+            self._timer = self.loop.call_later(_DELTA_FLUSH_INTERVAL, self._on_timer)
+    
+    async def flush(self):
+        """Send any pending text as a single text_delta frame"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        # Let a timer-started flush finish first so frames keep their order
+        timer_flush = self._timer_flush
+        if timer_flush is not None and timer_flush is not asyncio.current_task():
+            self._timer_flush = None
+            await timer_flush
+        
+        if self.pending:
+            content = "".join(self.pending)
+            count = len(self.pending)
+            self.pending.clear()
+            self.pending_len = 0
+            await send_ws_json(self.websocket, {
+                "type": "text_delta",
+                "content": content
             })
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Sent {count} batched text deltas")
+        self.last_flush = self.loop.time()
+    
+    async def maybe_flush(self):
+        """Flush once enough text is pending or the batch is old enough"""
+        if self.pending and (self.pending_len >= _DELTA_FLUSH_CHARS
+                             or self.loop.time() - self.last_flush >= _DELTA_FLUSH_INTERVAL):
+            await self.flush()
+    
+    def discard(self):
+        """Stop any scheduled flush; used when streaming is abandoned"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = self._timer_flush
+        if task is not None:
+            self._timer_flush = None
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Retrieve a failed send's exception so it is not reported as never retrieved
+                task.exception()
+
+
+async def _on_text_delta(event_data: Any, state: _StreamState):
+    """Handle a response.output_text.delta event"""
+    delta_text = getattr(event_data, 'delta', '')
+    if delta_text:
+        state.add_text(delta_text)
+
+
+async def _on_tool_call(event_data: Any, state: _StreamState):
+    """Handle a tool call event"""
+    tool_name = getattr(event_data, 'name', 'Unknown')
+    logger.info(f"Tool called: {tool_name}")
+    state.tool_calls.append({"name": tool_name, "status": "executed"})
     
-    def get_history(self, session_id: str) -> list:
-        """Get session history"""
-        if session_id in self.sessions:
-            return self.sessions[session_id]["messages"]
-        return []
+    # Special handling for ComputerTool
+    tool_data = {"name": tool_name}
+    if tool_name == 'ComputerTool' or 'computer' in tool_name.lower():
+        # Extract any screenshot or action data
+        if hasattr(event_data, 'screenshot'):
+            tool_data['screenshot'] = event_data.screenshot
+        if hasattr(event_data, 'action'):
+            tool_data['action'] = event_data.action
+        if hasattr(event_data, 'coordinates'):
+            tool_data['coordinates'] = event_data.coordinates
+        tool_data['type'] = 'computer'
+        logger.info(f"Computer action detected: {tool_data}")
+    
+    await state.flush()
+    await state.websocket.send_text(_TOOL_CALL_PREFIX + orjson.dumps(tool_data).decode() + "}")
+
+
+async def _on_response_done(event_data: Any, state: _StreamState):
+    """Handle response.done; the final text is handled after the stream ends"""
+    logger.info("Response completed via event")
+
 
+# Nested raw response event types; other response.tool* types also go to _on_tool_call
+_NESTED_HANDLERS = {
+    "response.output_text.delta": _on_text_delta,
+    "response.tool_call": _on_tool_call,
+    "response.done": _on_response_done,
+}
 
-# Global manager
-conversation_manager = ConversationManager()
+
+async def _stream_events(state: _StreamState, task: str) -> int:
+    """Stream agent events into state and return how many were seen"""
+    from app.agents import run_agent_stream
+    
+    try:
+        event_count = 0
+        
+        # Stream the events
+        async for event in run_agent_stream(task):
+            event_count += 1
+            try:
+                # Log event details for debugging
+                event_type = getattr(event, 'type', None)
+                
+                # Handle raw_response_event which contains the actual events
+                if event_type == 'raw_response_event':
+                    # Extract the nested data
+                    event_data = getattr(event, 'data', None)
+                    if event_data:
+                        nested_type = getattr(event_data, 'type', None) or ""
+                        handler = _NESTED_HANDLERS.get(nested_type)
+                        if handler is None and nested_type.startswith("response.tool"):
+                            handler = _on_tool_call
+                        
+                        if handler is not None:
+                            await handler(event_data, state)
+                        elif logger.isEnabledFor(logging.DEBUG):
+                            # Log other nested event types for debugging
+                            logger.debug(f"Nested event type: {nested_type}")
+                
+                # Handle direct event types (if they exist)
+                elif event_type == 'text-delta':
+                    text = getattr(event, 'text', '')
+                    if text:
+                        state.add_text(text)
+                
+                elif event_type == 'agent-message':
+                    content = getattr(event, 'content', '')
+                    if content and isinstance(content, str):
+                        if not state.full_response:
+                            state.full_response = content
+                            await state.flush()
+                            await send_ws_json(state.websocket, {
+                                "type": "text_complete",
+                                "content": content
+                            })
+                
+                # Handle other event types
+                elif hasattr(event, 'content'):
+                    content = event.content
+                    if isinstance(content, str):
+                        state.add_text(content)
+            
+            except Exception as event_error:
+                logger.error(f"Event processing error: {event_error}", exc_info=True)
+                continue
+            
+            await state.maybe_flush()
+            if event_count % YIELD_EVERY_EVENTS == 0:
+                await asyncio.sleep(0)
+        
+        await state.flush()
+        return event_count
+    finally:
+        # Never leave a timer or its flush aimed at the socket once streaming stops
+        state.discard()
 
 
 async def stream_agent_response_simple(websocket: WebSocket, task: str, session_id: str):
     """
     Stream agent response with simplified approach
     """
-    from app.agents import create_agent
+    from app.agents import get_agent
     
     try:
-        # Get or create agent
-        agent = create_agent()
+        # Get the shared agent
+        agent = await get_agent()
         if not agent:
-            await websocket.send_json({
+            await send_ws_json(websocket, {
                 "type": "error",
                 "error": "Failed to initialize agent"
             })
@@ -78,142 +239,28 @@ async def stream_agent_response_simple(websocket: WebSocket, task: str, session_
         conversation_manager.add_message(session_id, "user", task)
         
         # Send start signal
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "stream_start",
             "message": "Processing..."
         })
         
         logger.info(f"Processing task: {task[:50]}...")
         
+        state = _StreamState(websocket)
+        tool_calls = state.tool_calls
+        
         try:
             # Try streaming first
             logger.info("Attempting streaming response...")
-            result_stream = Runner.run_streamed(
-                starting_agent=agent,
-                input=task
-                # Don't use conversation_id since it requires specific format
-            )
-            
-            full_response = ""
-            tool_calls = []
-            event_count = 0
-            
-            # Stream the events
-            async for event in result_stream.stream_events():
-                event_count += 1
-                try:
-                    # Log event details for debugging
-                    event_type = getattr(event, 'type', None)
-                    
-                    # Handle raw_response_event which contains the actual events
-                    if event_type == 'raw_response_event':
-                        # Extract the nested data
-                        event_data = getattr(event, 'data', None)
-                        if event_data:
-                            nested_type = getattr(event_data, 'type', None)
-                            
-                            # Handle text delta events
-                            if nested_type == 'response.output_text.delta':
-                                delta_text = getattr(event_data, 'delta', '')
-                                if delta_text:
-                                    full_response += delta_text
-                                    await websocket.send_json({
-                                        "type": "text_delta",
-                                        "content": delta_text
-                                    })
-                                    logger.debug(f"Sent text delta: {delta_text}")
-                            
-                            # Handle tool call events
-                            elif nested_type == 'response.tool_call' or 'tool' in nested_type:
-                                tool_name = getattr(event_data, 'name', 'Unknown')
-                                logger.info(f"Tool called: {tool_name}")
-                                tool_calls.append({"name": tool_name, "status": "executed"})
-                                
-                                # Special handling for ComputerTool
-                                tool_data = {"name": tool_name}
-                                if tool_name == 'ComputerTool' or 'computer' in tool_name.lower():
-                                    # Extract any screenshot or action data
-                                    if hasattr(event_data, 'screenshot'):
-                                        tool_data['screenshot'] = event_data.screenshot
-                                    if hasattr(event_data, 'action'):
-                                        tool_data['action'] = event_data.action
-                                    if hasattr(event_data, 'coordinates'):
-                                        tool_data['coordinates'] = event_data.coordinates
-                                    tool_data['type'] = 'computer'
-                                    logger.info(f"Computer action detected: {tool_data}")
-                                
-                                await websocket.send_json({
-                                    "type": "tool_call",
-                                    "tool": tool_data
-                                })
-                            
-                            # Handle completion
-                            elif nested_type == 'response.done':
-                                logger.info("Response completed via event")
-                                # Response is done, we'll handle final text below
-                            
-                            # Log other nested event types for debugging
-                            else:
-                                logger.debug(f"Nested event type: {nested_type}")
-                    
-                    # Handle direct event types (if they exist)
-                    elif event_type == 'text-delta':
-                        text = getattr(event, 'text', '')
-                        if text:
-                            full_response += text
-                            await websocket.send_json({
-                                "type": "text_delta",
-                                "content": text
-                            })
-                    
-                    elif event_type == 'agent-message':
-                        content = getattr(event, 'content', '')
-                        if content and isinstance(content, str):
-                            if not full_response:
-                                full_response = content
-                                await websocket.send_json({
-                                    "type": "text_complete",
-                                    "content": content
-                                })
-                    
-                    # Handle other event types
-                    elif hasattr(event, 'content'):
-                        content = event.content
-                        if isinstance(content, str):
-                            full_response += content
-                            await websocket.send_json({
-                                "type": "text_delta",
-                                "content": content
-                            })
-                
-                except Exception as event_error:
-                    logger.error(f"Event processing error: {event_error}", exc_info=True)
-                    continue
-                
-                await asyncio.sleep(0.01)
+            event_count = await _stream_events(state, task)
+            full_response = state.full_response
             
             logger.info(f"Streamed {event_count} events, response length: {len(full_response)}")
             
-            # Get final result if we haven't captured it
+            # The stream finished without producing any text
             if not full_response:
-                logger.warning("No response captured from streaming, trying to get final result...")
-                try:
-                    # Wait for the stream to complete and get result
-                    final_result = await result_stream
-                    logger.debug(f"Final result type: {type(final_result)}, attrs: {dir(final_result)}")
-                    
-                    if hasattr(final_result, 'final_output'):
-                        full_response = final_result.final_output
-                        logger.info(f"Got final_output: {full_response[:50]}...")
-                    elif hasattr(final_result, 'output'):
-                        full_response = final_result.output
-                        logger.info(f"Got output: {full_response[:50]}...")
-                    else:
-                        full_response = str(final_result)
-                        logger.info(f"Stringified result: {full_response[:50]}...")
-                except Exception as final_error:
-                    logger.error(f"Failed to get final result: {final_error}")
-                    full_response = full_response or "I apologize, but I couldn't generate a proper response."
+                logger.warning("No response captured from streaming")
+                full_response = "I apologize, but I couldn't generate a proper response."
             
         except Exception as stream_error:
             logger.warning(f"Streaming failed, falling back to regular run: {stream_error}", exc_info=True)
@@ -223,34 +270,30 @@ async def stream_agent_response_simple(websocket: WebSocket, task: str, session_
                 logger.info("Attempting non-streaming response...")
                 result = await Runner.run(agent, input=task)
                 
-                logger.debug(f"Run result type: {type(result)}, attrs: {dir(result)}")
-                if hasattr(result, '__dict__'):
-                    logger.debug(f"Run result data: {result.__dict__}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Run result type: {type(result)}")
+                    if hasattr(result, '__dict__'):
+                        logger.debug(f"Run result data: {result.__dict__}")
                 
-                # Try multiple ways to extract the response
-                if hasattr(result, 'final_output') and result.final_output:
-                    full_response = result.final_output
-                    logger.info(f"Got final_output from run: {full_response[:50]}...")
-                elif hasattr(result, 'output') and result.output:
-                    full_response = result.output
-                    logger.info(f"Got output from run: {full_response[:50]}...")
-                elif hasattr(result, 'messages'):
-                    # Check if there are messages in the result
-                    for msg in result.messages:
-                        if hasattr(msg, 'content'):
-                            full_response = msg.content
-                            logger.info(f"Got message content: {full_response[:50]}...")
+                # Try the common result attributes first, then messages
+                full_response = (getattr(result, "final_output", None)
+                                 or getattr(result, "output", None)
+                                 or getattr(result, "content", None))
+                if not full_response:
+                    for msg in getattr(result, "messages", ()):
+                        full_response = getattr(msg, "content", None)
+                        if full_response:
                             break
-                elif hasattr(result, 'content'):
-                    full_response = result.content
-                    logger.info(f"Got content from run: {full_response[:50]}...")
+                
+                if full_response:
+                    logger.info(f"Got response from run: {str(full_response)[:50]}...")
                 else:
                     # Last resort - stringify it
                     full_response = str(result)
                     logger.warning(f"Had to stringify result: {full_response[:50]}...")
                 
                 # Send complete response
-                await websocket.send_json({
+                await send_ws_json(websocket, {
                     "type": "text_complete",
                     "content": full_response
                 })
@@ -258,7 +301,7 @@ async def stream_agent_response_simple(websocket: WebSocket, task: str, session_
             except Exception as run_error:
                 logger.error(f"Regular run also failed: {run_error}", exc_info=True)
                 full_response = f"I apologize, but I encountered an error: {str(run_error)}"
-                await websocket.send_json({
+                await send_ws_json(websocket, {
                     "type": "text_complete",
                     "content": full_response
                 })
@@ -267,7 +310,7 @@ async def stream_agent_response_simple(websocket: WebSocket, task: str, session_
         conversation_manager.add_message(session_id, "assistant", full_response)
         
         # Send completion
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "stream_complete",
             "final_text": full_response,
             "tool_calls": tool_calls
@@ -278,12 +321,28 @@ async def stream_agent_response_simple(websocket: WebSocket, task: str, session_
         error_msg = str(e)
         if "api_key" in error_msg.lower():
             error_msg = "API key not configured properly"
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "error",
             "error": error_msg
         })
 
 
+async def _send_screenshot(websocket: WebSocket):
+    """Send the current computer screenshot as a JSON header plus a binary PNG frame"""
+    from app.runtimes.computer_adapter import get_computer_adapter
+    
+    result = await get_computer_adapter().execute_action_binary("screenshot")
+    screenshot_bytes = result.pop("screenshot_bytes", None)
+    
+    await send_ws_json(websocket, {
+        "type": "action_result",
+        "has_screenshot": screenshot_bytes is not None,
+        **result
+    })
+    if screenshot_bytes is not None:
+        await websocket.send_bytes(screenshot_bytes)
+
+
 async def handle_websocket_fixed(websocket: WebSocket):
     """
     Handle WebSocket with fixed streaming
@@ -297,7 +356,7 @@ async def handle_websocket_fixed(websocket: WebSocket):
         session_id = conversation_manager.get_or_create_session()
         
         # Send session info
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "session_info",
             "session_id": session_id,
             "history": conversation_manager.get_history(session_id)
@@ -308,7 +367,7 @@ async def handle_websocket_fixed(websocket: WebSocket):
         while True:
             try:
                 # Receive message
-                data = await websocket.receive_json()
+                data = await receive_ws_json(websocket)
                 
                 if data.get("type") == "task":
                     task = data.get("task", "")
@@ -317,20 +376,20 @@ async def handle_websocket_fixed(websocket: WebSocket):
                 
                 elif data.get("type") == "get_history":
                     history = conversation_manager.get_history(session_id)
-                    await websocket.send_json({
+                    await send_ws_json(websocket, {
                         "type": "history",
                         "messages": history
                     })
                 
                 elif data.get("type") == "clear_history":
-                    if session_id in conversation_manager.sessions:
-                        conversation_manager.sessions[session_id]["messages"] = []
-                    await websocket.send_json({
-                        "type": "history_cleared"
-                    })
+                    conversation_manager.clear_history(session_id)
+                    await websocket.send_text(HISTORY_CLEARED_TEXT)
                 
                 elif data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    await websocket.send_text(PONG_TEXT)
+                
+                elif data.get("type") == "screenshot":
+                    await _send_screenshot(websocket)
                     
             except WebSocketDisconnect:
                 break
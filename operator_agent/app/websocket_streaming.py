@@ -3,61 +3,24 @@ Real streaming WebSocket support using OpenAI Agents SDK
 """
 
 import asyncio
-import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 from fastapi import WebSocket, WebSocketDisconnect
 from agents import Runner
-from app.settings import settings
-import uuid
+from app.conversation import conversation_manager
+from app.responses import HISTORY_CLEARED_TEXT, PONG_TEXT, YIELD_EVERY_EVENTS, receive_ws_json, send_ws_json
+from weakref import WeakValueDictionary
 
 logger = logging.getLogger(__name__)
 
 
-class ConversationManager:
-    """Manage conversation sessions and history"""
-    
-    def __init__(self):
-        # In-memory storage (replace with Redis/DB in production)
-        self.conversations: Dict[str, Dict[str, Any]] = {}
-    
-    def get_or_create_session(self, session_id: str = None) -> str:
-        """Get existing session or create new one"""
-        if not session_id:
-            session_id = str(uuid.uuid4())
-        
-        if session_id not in self.conversations:
-            self.conversations[session_id] = {
-                "id": session_id,
-                "messages": [],
-                "created_at": asyncio.get_event_loop().time()
-            }
-            logger.info(f"Created new conversation: {session_id}")
-        
-        return session_id
-    
-    def add_message(self, session_id: str, role: str, content: str):
-        """Add message to conversation history"""
-        if session_id in self.conversations:
-            self.conversations[session_id]["messages"].append({
-                "role": role,
-                "content": content,
-                "timestamp": asyncio.get_event_loop().time()
-            })
-    
-    def get_history(self, session_id: str) -> list:
-        """Get conversation history"""
-        if session_id in self.conversations:
-            return self.conversations[session_id]["messages"]
-        return []
-
-
 class StreamingConnectionManager:
     """Manage WebSocket connections with streaming"""
     
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.conversation_manager = ConversationManager()
+        # Weak values let GC reclaim sockets the framework has released even if disconnect() is missed
+        self.active_connections: "WeakValueDictionary[str, WebSocket]" = WeakValueDictionary()
+        self.conversation_manager = conversation_manager
     
     async def connect(self, websocket: WebSocket, session_id: str = None) -> str:
         """Accept connection and return session ID"""
@@ -67,7 +30,7 @@ class StreamingConnectionManager:
         
         # Send session info and history
         history = self.conversation_manager.get_history(session_id)
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "session_info",
             "session_id": session_id,
             "history": history
@@ -78,15 +41,15 @@ class StreamingConnectionManager:
     
     def disconnect(self, session_id: str):
         """Remove disconnected client"""
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
+        self.active_connections.pop(session_id, None)
         logger.info(f"Client disconnected: {session_id}")
     
     async def send_json(self, session_id: str, data: Dict[str, Any]):
         """Send JSON to specific client"""
-        if session_id in self.active_connections:
+        websocket = self.active_connections.get(session_id)
+        if websocket is not None:
             try:
-                await self.active_connections[session_id].send_json(data)
+                await send_ws_json(websocket, data)
             except Exception as e:
                 logger.error(f"Error sending to {session_id}: {e}")
 
@@ -99,13 +62,13 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
     """
     Stream real agent response using OpenAI SDK streaming
     """
-    from app.agents import create_agent
+    from app.agents import get_agent
     
     try:
-        # Get or create agent
-        agent = create_agent()
+        # Get the shared agent (built once per event loop)
+        agent = await get_agent()
         if not agent:
-            await websocket.send_json({
+            await send_ws_json(websocket, {
                 "type": "error",
                 "error": "Failed to initialize agent"
             })
@@ -115,7 +78,7 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
         manager.conversation_manager.add_message(session_id, "user", task)
         
         # Send start signal
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "stream_start",
             "message": "Processing your request..."
         })
@@ -133,17 +96,19 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
         # Stream the events
         full_response = ""
         tool_calls = []
+        event_count = 0
         
         try:
-            # Process streaming events
+            # Process streaming events; pacing comes from send back-pressure, not sleeps
             async for event in result_stream.stream_events():
+                event_count += 1
                 # Handle different event types
                 if hasattr(event, 'type'):
                     if event.type == 'text_delta':
                         # Stream text chunks
                         chunk = getattr(event, 'text', '')
                         full_response += chunk
-                        await websocket.send_json({
+                        await send_ws_json(websocket, {
                             "type": "text_delta",
                             "content": chunk
                         })
@@ -155,7 +120,7 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
                             "status": "executing"
                         }
                         tool_calls.append(tool_info)
-                        await websocket.send_json({
+                        await send_ws_json(websocket, {
                             "type": "tool_call",
                             "tool": tool_info
                         })
@@ -167,13 +132,13 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
                 # For text content directly
                 elif isinstance(event, str):
                     full_response += event
-                    await websocket.send_json({
+                    await send_ws_json(websocket, {
                         "type": "text_delta",
                         "content": event
                     })
                 
-                # Small delay to prevent overwhelming
-                await asyncio.sleep(0.01)
+                if event_count % YIELD_EVERY_EVENTS == 0:
+                    await asyncio.sleep(0)
         
         except Exception as stream_error:
             logger.warning(f"Streaming iteration error: {stream_error}")
@@ -186,7 +151,7 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
                     full_response = str(final_result)
                 
                 # Send the complete response at once
-                await websocket.send_json({
+                await send_ws_json(websocket, {
                     "type": "text_complete",
                     "content": full_response
                 })
@@ -198,7 +163,7 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
         manager.conversation_manager.add_message(session_id, "assistant", full_response)
         
         # Send completion
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "stream_complete",
             "final_text": full_response,
             "tool_calls": tool_calls
@@ -206,7 +171,7 @@ async def stream_agent_response(websocket: WebSocket, task: str, session_id: str
         
     except Exception as e:
         logger.error(f"Error in stream_agent_response: {e}")
-        await websocket.send_json({
+        await send_ws_json(websocket, {
             "type": "error",
             "error": str(e)
         })
@@ -224,7 +189,7 @@ async def handle_streaming_websocket(websocket: WebSocket):
         
         while True:
             # Wait for messages
-            data = await websocket.receive_json()
+            data = await receive_ws_json(websocket)
             
             if data.get("type") == "task":
                 task = data.get("task", "")
@@ -235,21 +200,18 @@ async def handle_streaming_websocket(websocket: WebSocket):
             elif data.get("type") == "get_history":
                 # Send conversation history
                 history = manager.conversation_manager.get_history(session_id)
-                await websocket.send_json({
+                await send_ws_json(websocket, {
                     "type": "history",
                     "messages": history
                 })
             
             elif data.get("type") == "clear_history":
                 # Clear conversation
-                if session_id in manager.conversation_manager.conversations:
-                    manager.conversation_manager.conversations[session_id]["messages"] = []
-                await websocket.send_json({
-                    "type": "history_cleared"
-                })
+                manager.conversation_manager.clear_history(session_id)
+                await websocket.send_text(HISTORY_CLEARED_TEXT)
             
             elif data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await websocket.send_text(PONG_TEXT)
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {session_id}")
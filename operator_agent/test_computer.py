@@ -2,51 +2,87 @@
 """Test WebSocket with computer use command"""
 
 import asyncio
-import json
+import orjson
 import websockets
 
-async def test_computer_use():
-    uri = "ws://localhost:8000/ws"
+from ws_client import CONNECT_OPTIONS, EMPTY, WS_URI, TextBuffer, run_main
+
+# The task frame is constant, so serialize it once at import
+TEST_MESSAGE = orjson.dumps({
+    "type": "task",
+    "task": "Take a screenshot of the current screen"
+})
+
+# Streamed text is written in batches rather than one flushed print per delta
+_text = TextBuffer()
+
+
+def _on_text(data):
+    _text.write(f"Text: {data.get('content', '')}")
+
+
+def _on_tool(data):
+    _text.flush()
+    print(f"\n[Tool: {(data.get('tool') or EMPTY).get('name', 'Unknown')}]")
+
+
+def _on_done(data):
+    _text.flush()
+    print(f"\nFinal: {data.get('final_text', '')[:100]}")
+    return True
+
+
+def _on_other(data):
+    _text.flush()
+    print(f"\nEvent: {data.get('type')}")
+
+
+# Event type -> handler; a truthy return ends the stream
+HANDLERS = {
+    "text_delta": _on_text,
+    "tool_call": _on_tool,
+    "stream_complete": _on_done,
+}
+
+
+async def run(websocket):
+    """Send the computer use command on an open connection and print the stream"""
+    # Send a computer use command
+    await websocket.send(TEST_MESSAGE)
+    print("Sent computer use command")
     
-    async with websockets.connect(uri) as websocket:
+    # Receive responses under one idle deadline, pushed back after each frame
+    loop = asyncio.get_running_loop()
+    try:
+        async with asyncio.timeout(15.0) as deadline:
+            while True:
+                response = await websocket.recv(decode=False)
+                deadline.reschedule(loop.time() + 15.0)
+                data = orjson.loads(response)
+                handler = HANDLERS.get(data.get('type'), _on_other)
+                if handler(data):
+                    break
+    except websockets.ConnectionClosedOK:
+        _text.flush()
+    except TimeoutError:
+        _text.flush()
+        print("\nTimeout waiting for response")
+    except websockets.ConnectionClosedError as e:
+        _text.flush()
+        print(f"\nError: {e}")
+
+
+async def test_computer_use():
+    async with websockets.connect(WS_URI, **CONNECT_OPTIONS) as websocket:
         print("Connected to WebSocket")
         
         # Wait for session info
-        response = await websocket.recv()
-        data = json.loads(response)
+        response = await websocket.recv(decode=False)
+        data = orjson.loads(response)
         print(f"Session info: {data}")
         
-        # Send a computer use command
-        test_message = {
-            "type": "task",
-            "task": "Take a screenshot of the current screen"
-        }
-        await websocket.send(json.dumps(test_message))
-        print("Sent computer use command")
-        
-        # Receive responses
-        while True:
-            try:
-                response = await asyncio.wait_for(websocket.recv(), timeout=15.0)
-                data = json.loads(response)
-                event_type = data.get('type')
-                
-                if event_type == 'text_delta':
-                    print(f"Text: {data.get('content', '')}", end='', flush=True)
-                elif event_type == 'tool_call':
-                    print(f"\n[Tool: {data.get('tool', {}).get('name', 'Unknown')}]")
-                elif event_type == 'stream_complete':
-                    print(f"\nFinal: {data.get('final_text', '')[:100]}")
-                    break
-                else:
-                    print(f"\nEvent: {event_type}")
-                    
-            except asyncio.TimeoutError:
-                print("\nTimeout waiting for response")
-                break
-            except Exception as e:
-                print(f"\nError: {e}")
-                break
+        await run(websocket)
+
 
 if __name__ == "__main__":
-    asyncio.run(test_computer_use())
\ No newline at end of file
+    run_main(test_computer_use())
\ No newline at end of file
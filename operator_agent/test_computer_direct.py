@@ -2,64 +2,103 @@
 """Test ComputerTool directly"""
 
 import asyncio
-import json
+import orjson
 import websockets
 
-async def test_computer():
-    uri = "ws://localhost:8000/ws"
+from ws_client import CONNECT_OPTIONS, EMPTY, WS_URI, TextBuffer, run_main
+
+# The task frame is constant, so serialize it once at import
+TEST_MESSAGE = orjson.dumps({
+    "type": "task",
+    "task": "Take a screenshot of the desktop and describe what you see"
+})
+
+# Streamed text is written in batches rather than one flushed print per delta
+_text = TextBuffer()
+
+
+def _on_text(data, tool_calls):
+    _text.write(data.get('content', ''))
+
+
+def _on_tool(data, tool_calls):
+    _text.flush()
+    tool = data.get('tool') or EMPTY
+    tool_calls.append(tool)
+    print(f"\n\n🔧 TOOL CALLED: {tool.get('name')}")
+    if tool.get('type') == 'computer':
+        print("  ✅ Computer Use detected!")
+        if tool.get('screenshot'):
+            print(f"  📷 Screenshot: {tool.get('screenshot')[:50]}...")
+
+
+def _on_done(data, tool_calls):
+    _text.flush()
+    print(f"\n\n✅ Complete")
+    print(f"Tools used: {[t.get('name') for t in tool_calls]}")
+    return True
+
+
+def _on_error(data, tool_calls):
+    _text.flush()
+    print(f"\n❌ Error: {data.get('error')}")
+    return True
+
+
+# Event type -> handler; a truthy return ends the stream
+HANDLERS = {
+    "text_delta": _on_text,
+    "tool_call": _on_tool,
+    "stream_complete": _on_done,
+    "error": _on_error,
+}
+
+
+async def run(websocket):
+    """Send the screenshot request on an open connection and report tool calls"""
+    # Send a computer use command
+    await websocket.send(TEST_MESSAGE)
+    print("Sent screenshot request")
+    
+    # Collect responses
+    tool_calls = []
+    
+    # Read frames under one idle deadline, pushed back after each frame
+    loop = asyncio.get_running_loop()
     
-    async with websockets.connect(uri) as websocket:
+    # Bind hot-loop lookups to locals once instead of resolving them per frame
+    recv = websocket.recv
+    loads = orjson.loads
+    now = loop.time
+    get_handler = HANDLERS.get
+    try:
+        async with asyncio.timeout(20.0) as deadline:
+            reschedule = deadline.reschedule
+            while True:
+                response = await recv(decode=False)
+                reschedule(now() + 20.0)
+                data = loads(response)
+                handler = get_handler(data.get('type'))
+                if handler and handler(data, tool_calls):
+                    break
+    except websockets.ConnectionClosedOK:
+        _text.flush()
+    except TimeoutError:
+        _text.flush()
+        print("\n⏱️ Timeout")
+
+
+async def test_computer():
+    async with websockets.connect(WS_URI, **CONNECT_OPTIONS) as websocket:
         print("Connected to WebSocket")
         
         # Wait for session info
-        response = await websocket.recv()
-        data = json.loads(response)
+        response = await websocket.recv(decode=False)
+        data = orjson.loads(response)
         print(f"Session: {data.get('session_id')}")
         
-        # Send a computer use command
-        test_message = {
-            "type": "task",
-            "task": "Take a screenshot of the desktop and describe what you see"
-        }
-        await websocket.send(json.dumps(test_message))
-        print("Sent screenshot request")
-        
-        # Collect responses
-        tool_calls = []
-        text_response = ""
-        
-        while True:
-            try:
-                response = await asyncio.wait_for(websocket.recv(), timeout=20.0)
-                data = json.loads(response)
-                event_type = data.get('type')
-                
-                if event_type == 'text_delta':
-                    text = data.get('content', '')
-                    text_response += text
-                    print(text, end='', flush=True)
-                    
-                elif event_type == 'tool_call':
-                    tool = data.get('tool', {})
-                    tool_calls.append(tool)
-                    print(f"\n\n🔧 TOOL CALLED: {tool.get('name')}")
-                    if tool.get('type') == 'computer':
-                        print("  ✅ Computer Use detected!")
-                        if tool.get('screenshot'):
-                            print(f"  📷 Screenshot: {tool.get('screenshot')[:50]}...")
-                            
-                elif event_type == 'stream_complete':
-                    print(f"\n\n✅ Complete")
-                    print(f"Tools used: {[t.get('name') for t in tool_calls]}")
-                    break
-                    
-                elif event_type == 'error':
-                    print(f"\n❌ Error: {data.get('error')}")
-                    break
-                    
-            except asyncio.TimeoutError:
-                print("\n⏱️ Timeout")
-                break
+        await run(websocket)
+
 
 if __name__ == "__main__":
-    asyncio.run(test_computer())
\ No newline at end of file
+    run_main(test_computer())
\ No newline at end of file
@@ -1,42 +1,52 @@
 #!/usr/bin/env python3
 import asyncio
-import json
+import orjson
 import websockets
 
-async def test_websocket():
-    uri = "ws://localhost:8000/ws"
+from ws_client import CONNECT_OPTIONS, WS_URI, run_main
+
+# The task frame is constant, so serialize it once at import
+TASK = "What is the weather like today?"
+TASK_MESSAGE = orjson.dumps({"type": "task", "task": TASK})
+
+
+async def run(websocket):
+    """Send the test task on an open connection and print the replies"""
+    # Send a test task
+    await websocket.send(TASK_MESSAGE)
+    print(f"Sent task: {TASK}")
     
-    async with websockets.connect(uri) as websocket:
-        print("Connected to WebSocket")
-        
-        # Send a test task
-        task = {
-            "type": "task",
-            "task": "What is the weather like today?"
-        }
-        await websocket.send(json.dumps(task))
-        print(f"Sent task: {task['task']}")
-        
-        # Receive messages
-        while True:
-            try:
-                message = await asyncio.wait_for(websocket.recv(), timeout=10.0)
-                data = json.loads(message)
+    # Receive messages under one idle deadline, pushed back after each frame
+    loop = asyncio.get_running_loop()
+    try:
+        async with asyncio.timeout(10.0) as deadline:
+            while True:
+                message = await websocket.recv(decode=False)
+                deadline.reschedule(loop.time() + 10.0)
+                data = orjson.loads(message)
+                event_type = data.get("type")
                 print(f"Received: {data}")
                 
-                if data.get("type") == "complete":
+                if event_type == "complete":
                     print("Task completed!")
                     break
-                elif data.get("type") == "error":
+                elif event_type == "error":
                     print(f"Error: {data.get('error')}")
                     break
-                    
-            except asyncio.TimeoutError:
-                print("Timeout waiting for response")
-                break
-            except Exception as e:
-                print(f"Error: {e}")
-                break
+    except websockets.ConnectionClosedOK:
+        pass
+    except TimeoutError:
+        print("Timeout waiting for response")
+    except websockets.ConnectionClosedError as e:
+        print(f"Error: {e}")
+
+
+async def test_websocket():
+    async with websockets.connect(WS_URI, **CONNECT_OPTIONS) as websocket:
+        print("Connected to WebSocket")
+        
+        await run(websocket)
+
 
 if __name__ == "__main__":
-    asyncio.run(test_websocket())
\ No newline at end of file
+    run_main(test_websocket())
\ No newline at end of file
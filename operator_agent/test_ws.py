@@ -2,45 +2,57 @@
 """Test WebSocket connection directly"""
 
 import asyncio
-import json
+import orjson
 import websockets
 
-async def test_websocket():
-    uri = "ws://localhost:8000/ws"
+from ws_client import CONNECT_OPTIONS, WS_URI, run_main
+
+# The task frame is constant, so serialize it once at import
+TEST_MESSAGE = orjson.dumps({
+    "type": "task",
+    "task": "What is 2+2?"
+})
+
+
+async def run(websocket):
+    """Send the test message on an open connection and print the stream"""
+    # Send a test message
+    await websocket.send(TEST_MESSAGE)
+    print("Sent test message")
     
-    async with websockets.connect(uri) as websocket:
+    # Receive responses under one idle deadline, pushed back after each frame
+    loop = asyncio.get_running_loop()
+    try:
+        async with asyncio.timeout(10.0) as deadline:
+            while True:
+                response = await websocket.recv(decode=False)
+                deadline.reschedule(loop.time() + 10.0)
+                data = orjson.loads(response)
+                event_type = data['type']
+                print(f"Received: {event_type} - {data.get('content', data.get('message', ''))[:100]}")
+                
+                if event_type == 'stream_complete':
+                    print(f"Final response: {data.get('final_text', '')}")
+                    break
+    except websockets.ConnectionClosedOK:
+        pass
+    except TimeoutError:
+        print("Timeout waiting for response")
+    except websockets.ConnectionClosedError as e:
+        print(f"Error: {e}")
+
+
+async def test_websocket():
+    async with websockets.connect(WS_URI, **CONNECT_OPTIONS) as websocket:
         print("Connected to WebSocket")
         
         # Wait for session info
-        response = await websocket.recv()
-        data = json.loads(response)
+        response = await websocket.recv(decode=False)
+        data = orjson.loads(response)
         print(f"Session info: {data}")
         
-        # Send a test message
-        test_message = {
-            "type": "task",
-            "task": "What is 2+2?"
-        }
-        await websocket.send(json.dumps(test_message))
-        print("Sent test message")
-        
-        # Receive responses
-        while True:
-            try:
-                response = await asyncio.wait_for(websocket.recv(), timeout=10.0)
-                data = json.loads(response)
-                print(f"Received: {data['type']} - {data.get('content', data.get('message', ''))[:100]}")
-                
-                if data['type'] == 'stream_complete':
-                    print(f"Final response: {data.get('final_text', '')}")
-                    break
-                    
-            except asyncio.TimeoutError:
-                print("Timeout waiting for response")
-                break
-            except Exception as e:
-                print(f"Error: {e}")
-                break
+        await run(websocket)
+
 
 if __name__ == "__main__":
-    asyncio.run(test_websocket())
\ No newline at end of file
+    run_main(test_websocket())
\ No newline at end of file
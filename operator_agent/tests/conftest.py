@@ -0,0 +1,35 @@
+"""
+Shared pytest fixtures
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+import websockets
+
+# Make the app package and the root client scripts importable, once per run
+_ROOT = str(Path(__file__).parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from ws_client import CONNECT_OPTIONS, WS_URI
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "fast: quick combined checks, run with -m fast")
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def ws():
+    """One WebSocket connection to a running server, shared by every client scenario"""
+    try:
+        connection = await websockets.connect(WS_URI, **CONNECT_OPTIONS)
+    except OSError:
+        pytest.skip(f"No server listening at {WS_URI}")
+    
+    async with connection:
+        # Consume the session_info frame once for the whole session
+        await connection.recv()
+        yield connection
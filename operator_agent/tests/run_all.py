@@ -0,0 +1,37 @@
+"""
+Run every WebSocket client scenario in one process over one connection
+
+Run from the project root: python -m tests.run_all
+"""
+
+import orjson
+import websockets
+
+import test_computer
+import test_computer_direct
+import test_websocket
+import test_ws
+from ws_client import CONNECT_OPTIONS, WS_URI, resync, run_main
+
+# Client scripts exposing run(websocket)
+SCENARIOS = [test_computer, test_computer_direct, test_websocket, test_ws]
+
+
+async def main():
+    """Connect once and run each scenario in turn"""
+    async with websockets.connect(WS_URI, **CONNECT_OPTIONS) as websocket:
+        session = orjson.loads(await websocket.recv(decode=False))
+        print(f"Session: {session.get('session_id')}")
+        
+        for scenario in SCENARIOS:
+            print("\n" + "=" * 50)
+            print(scenario.__name__)
+            print("=" * 50)
+            await scenario.run(websocket)
+            
+            # A scenario that timed out may leave frames behind for the next one
+            await resync(websocket)
+
+
+if __name__ == "__main__":
+    run_main(main())
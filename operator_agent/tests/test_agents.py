@@ -0,0 +1,27 @@
+import pytest
+
+from app.agents import _tool_keyword_hits
+
+# Keyword lists from the original per-tool substring checks
+_SUBSTRING_KEYWORDS = {
+    "ws": ["websearch", "search"],
+    "fs": ["jacket", "patagonia", "tokyo", "shop", "preference", "budget", "docs", "documentation"],
+    "at": ["airtable"],
+    "mcp": ["file", "write", "create", "sandbox"],
+    "ct": ["open", "click", "type", "navigate", "cart", "website"],
+}
+
+
+@pytest.mark.parametrize("task", [
+    "shopen the jacket page",
+    "websearch for tokyo shops",
+    "typewrite a file",
+    "airtablecart",
+    "searchopen",
+    "nothing relevant here",
+])
+def test_keyword_hits_match_substring_checks(task):
+    """Overlapping keywords resolve to the same tool groups as plain substring checks"""
+    expected = {group for group, words in _SUBSTRING_KEYWORDS.items()
+                if any(word in task for word in words)}
+    assert _tool_keyword_hits(task) == expected
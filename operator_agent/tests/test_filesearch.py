@@ -1,12 +1,13 @@
 import asyncio
-import sys
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import pytest
 
 from app.settings import settings
 from app.startup.vectorstore_bootstrap import bootstrap_vector_store, get_test_queries
+from ws_client import run_main
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
 
 async def test_vector_store_creation():
@@ -14,22 +15,17 @@ async def test_vector_store_creation():
     print("Testing vector store creation...")
     
     if not settings.has_openai:
-        print("⚠️  No OpenAI API key - skipping vector store tests")
-        return False
+        pytest.skip("No OpenAI API key - skipping vector store tests")
     
     # Check if already exists
     if settings.has_vector_store:
         print(f"✓ Vector store already exists: {settings.openai_vector_store_id}")
-        return True
+        return
     
     # Try to create
     store_id = await bootstrap_vector_store()
-    if store_id:
-        print(f"✓ Vector store created: {store_id}")
-        return True
-    else:
-        print("✗ Failed to create vector store")
-        return False
+    assert store_id, "Failed to create vector store"
+    print(f"✓ Vector store created: {store_id}")
 
 
 async def test_filesearch_queries():
@@ -37,44 +33,58 @@ async def test_filesearch_queries():
     print("\nTesting FileSearch queries...")
     
     if not settings.has_openai or not settings.has_vector_store:
-        print("⚠️  FileSearch not available - skipping query tests")
-        return
+        pytest.skip("FileSearch not available - skipping query tests")
     
     from app.agents import run_agent
     
-    test_queries = get_test_queries()
+    test_queries = get_test_queries()[:2]  # Test first 2 queries
+    
+    # Queries are independent, so run them concurrently and report in order
+    results = await asyncio.gather(*(run_agent(query) for query in test_queries))
     
-    for query in test_queries[:2]:  # Test first 2 queries
+    failed = []
+    for query, result in zip(test_queries, results):
         print(f"\nQuery: {query}")
-        result = await run_agent(query)
         
         if result["mode"] == "error":
             print(f"  ✗ Error: {result['final_text'][:100]}")
+            failed.append(query)
         else:
             print(f"  ✓ Result: {result['final_text'][:100]}...")
             if result["used_file_search"]:
                 print("  ✓ FileSearch was used")
             else:
                 print("  ⚠️  FileSearch not detected in tool calls")
+    
+    assert not failed, f"Queries failed: {failed}"
 
 
-def test_persistence():
+async def test_persistence():
     """Test that vector store ID persists"""
     print("\nTesting persistence...")
     
     state_file = Path(".state/operator_agent.json")
-    if state_file.exists():
-        print(f"✓ State file exists: {state_file}")
-        
-        import json
-        with open(state_file) as f:
-            state = json.load(f)
-            if "vector_store_id" in state:
-                print(f"✓ Vector store ID persisted: {state['vector_store_id']}")
-                return True
+    if not state_file.exists():
+        pytest.skip("No persisted state found")
+    print(f"✓ State file exists: {state_file}")
     
-    print("⚠️  No persisted state found")
-    return False
+    from app.settings import read_json_file
+    state = read_json_file(state_file)
+    assert "vector_store_id" in state, "State file has no vector store ID"
+    print(f"✓ Vector store ID persisted: {state['vector_store_id']}")
+
+
+async def _run_check(check) -> bool:
+    """Run one test outside pytest, reporting skips and failures instead of raising"""
+    try:
+        await check()
+    except pytest.skip.Exception as e:
+        print(f"⚠️  {e.msg}")
+        return False
+    except AssertionError as e:
+        print(f"✗ {e}")
+        return False
+    return True
 
 
 async def main():
@@ -84,18 +94,18 @@ async def main():
     print("=" * 50)
     
     # Test creation
-    created = await test_vector_store_creation()
+    created = await _run_check(test_vector_store_creation)
     
     # Test queries if created
     if created:
-        await test_filesearch_queries()
+        await _run_check(test_filesearch_queries)
     
     # Test persistence
-    test_persistence()
+    await _run_check(test_persistence)
     
     print("\n" + "=" * 50)
     print("Tests complete!")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_main(main())
\ No newline at end of file
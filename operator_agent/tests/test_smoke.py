@@ -1,20 +1,30 @@
 import pytest
+import pytest_asyncio
 import asyncio
-from fastapi.testclient import TestClient
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import httpx
 
 from app.main import app
 
-client = TestClient(app)
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+def make_client() -> httpx.AsyncClient:
+    """In-process client that calls the app on the running loop, without TestClient's thread hop"""
+    # ASGITransport sends no lifespan events, so startup/shutdown hooks never run here;
+    # /run builds the agent lazily and does not need them
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """One client shared by every smoke test"""
+    async with make_client() as c:
+        yield c
 
 
-def test_health_endpoint():
+async def test_health_endpoint(client):
     """Test health check endpoint"""
-    response = client.get("/healthz")
+    response = await client.get("/healthz")
     assert response.status_code == 200
     
     data = response.json()
@@ -26,9 +36,9 @@ def test_health_endpoint():
     assert "mcp" in data
 
 
-def test_root_endpoint():
+async def test_root_endpoint(client):
     """Test root endpoint"""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     
     data = response.json()
@@ -37,9 +47,9 @@ def test_root_endpoint():
     assert data["health"] == "/healthz"
 
 
-def test_run_endpoint_basic():
+async def test_run_endpoint_basic(client):
     """Test run endpoint with basic task"""
-    response = client.post(
+    response = await client.post(
         "/run",
         json={"task": "What is Python?"}
     )
@@ -53,25 +63,54 @@ def test_run_endpoint_basic():
     assert isinstance(data["mode_flags"], dict)
 
 
-def test_run_endpoint_invalid():
+async def test_run_endpoint_invalid(client):
     """Test run endpoint with invalid request"""
-    response = client.post("/run", json={})
+    response = await client.post("/run", json={})
     assert response.status_code == 422  # Validation error
 
 
-if __name__ == "__main__":
-    # Run tests
-    print("Running smoke tests...")
-    test_health_endpoint()
-    print("✓ Health endpoint works")
+@pytest.mark.fast
+async def test_all_endpoints_concurrent(client):
+    """Hit every endpoint at once so /healthz and / complete while /run is in flight"""
+    health, root, run, invalid = await asyncio.gather(
+        client.get("/healthz"),
+        client.get("/"),
+        client.post("/run", json={"task": "What is Python?"}),
+        client.post("/run", json={})
+    )
     
-    test_root_endpoint()
-    print("✓ Root endpoint works")
+    assert health.status_code == 200
+    assert health.json()["ok"] is True
     
-    test_run_endpoint_basic()
-    print("✓ Run endpoint works")
+    assert root.status_code == 200
+    assert root.json()["status"] == "running"
     
-    test_run_endpoint_invalid()
-    print("✓ Validation works")
+    assert run.status_code == 200
+    data = run.json()
+    assert isinstance(data["steps"], list)
+    assert isinstance(data["mode_flags"], dict)
+    
+    assert invalid.status_code == 422
+
+
+async def main():
+    """Run the smoke tests without pytest"""
+    print("Running smoke tests...")
+    async with make_client() as client:
+        await test_health_endpoint(client)
+        print("✓ Health endpoint works")
+        
+        await test_root_endpoint(client)
+        print("✓ Root endpoint works")
+        
+        await test_run_endpoint_basic(client)
+        print("✓ Run endpoint works")
+        
+        await test_run_endpoint_invalid(client)
+        print("✓ Validation works")
     
-    print("\nAll tests passed!")
\ No newline at end of file
+    print("\nAll tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+Run the WebSocket client scenarios against a live server over one connection
+"""
+
+import pytest
+
+from run_all import SCENARIOS
+from ws_client import resync
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda module: module.__name__)
+async def test_client_scenario(ws, scenario):
+    """Each scenario sends its task and consumes the reply on the shared connection"""
+    try:
+        await scenario.run(ws)
+    finally:
+        # Leave the shared connection idle for the next scenario, even after a timeout
+        await resync(ws)
@@ -0,0 +1,61 @@
+"""Helpers shared by the WebSocket client scripts"""
+
+import asyncio
+import sys
+import time
+
+import orjson
+
+WS_URI = "ws://localhost:8000/ws"
+
+# Small JSON frames on localhost: skip permessage-deflate, allow large screenshot frames
+CONNECT_OPTIONS = {"compression": None, "max_size": 2**22}
+
+# A ping is answered only after every frame of the task before it, so its pong marks a clean stream
+PING_MESSAGE = orjson.dumps({"type": "ping"})
+PONG_FRAME = orjson.dumps({"type": "pong"})
+
+# Shared read-only fallback for frames without a tool dict
+EMPTY: dict = {}
+
+
+class TextBuffer:
+    """Buffer text deltas and write them every 256 characters or 50ms"""
+    
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+    
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        now = time.monotonic()
+        if self.size >= 256 or now - self.last_flush >= 0.05:
+            self.flush(now)
+    
+    def flush(self, now=None):
+        if self.parts:
+            sys.stdout.write("".join(self.parts))
+            sys.stdout.flush()
+            self.parts.clear()
+            self.size = 0
+        self.last_flush = now or time.monotonic()
+
+
+async def resync(websocket, timeout=60.0):
+    """Discard frames left over from an unfinished task until the connection is idle again"""
+    await websocket.send(PING_MESSAGE)
+    async with asyncio.timeout(timeout):
+        while await websocket.recv(decode=False) != PONG_FRAME:
+            pass
+
+
+def run_main(coro):
+    """Run a script's entry coroutine, on uvloop when it is installed"""
+    # uvloop is faster when installed (not available on every dev box)
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    return uvloop.run(coro)